@@ -69,31 +69,123 @@ The software is open source, highly configurable, and easily lends itself to int
 
 import os as os
 os.environ['SDL_VIDEODRIVER']='dummy' # Use this if running the Ubuntu bash on windows
-import pygame, sys, math, random, csv, glob, subprocess, shutil, heapq, argparse, textwrap
+import pygame, sys, math, random, csv, glob, subprocess, shutil, argparse, textwrap, time, multiprocessing
 import lib.standard_deviation_function as sdef
+import lib.money_flow_index as money_flow_index
 import lib.TextColors as TextColors
+import lib.ohlcv_cache as ohlcv_cache
+import lib.csv_watcher as csv_watcher
+import lib.csv_catalog as csv_catalog
+import lib.ohlcv_archive as ohlcv_archive
+import lib.csv_schema as csv_schema
+import lib.ohlcv_resample as ohlcv_resample
+import lib.streaming_indicators as streaming_indicators
+import lib.indicator_memo as indicator_memo
+import lib.signal_engine as signal_engine
+import lib.convergence as convergence
+import lib.particle_histogram as particle_histogram
+import lib.world_checkpoint as world_checkpoint
+import lib.deposition as deposition
+import lib.ensemble as ensemble
 from lib.extremephysics import *
 from numpy import interp
+import numpy as np
 from PIL import Image, ImageDraw
 
 target_dir = "../csv/"
 file_type = '.csv'
 particle_birth_count = 1280 # should match window width
-
+ENGINES = ("physics", "deposition")
+CALIBRATION_OFFSETS = (0, 50, 100, 150) # --calibrate_engine: the windows compared, in candles back from the newest
+MERGE_TOLERANCE = 1.5 # --benchmark_merge: merged candles may move up to this many times the particles a new seed moves
+
+
+# The command line is shared by the runner at the bottom of this file and the ControlVolumeTank.
+def get_argument_parser():
+	helpMessage = 'See README.md and setup_instructions.md for specifics. Here are some commands to try: \n' + \
+		"• Standard deviation of price (SD, yellow line) + Volume SD (blue line) + 100 lowest sigma values highlighted in green: " + TextColors.OKGREEN + 'python cvt_00014.py --sigma_period 17 -hrat 1 -v -ssl 100' + TextColors.ENDC + "\n" + \
+		"• Price SD + lowest sigma values highlighted in green: " + TextColors.OKGREEN + 'python cvt_00014.py --sigma_period 23 --highlight_sigma True -v ' + TextColors.ENDC + "\n" + \
+		"• Price SD + histogram SD of particle distribution: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 19 -v -hrat False -hsd True -hsdp 34" + TextColors.ENDC + "\n" + \
+		"• Price SD + histogram moving average (MA) of particle distribution: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 17 -v -hrat False -hsa True -hsap 23" + TextColors.ENDC + "\n" + \
+		"• Price SD + histogram MA with a larger set of low SD highlighted: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 34 -v -hrat True -ssl 100" + TextColors.ENDC + "\n" + \
+		"• Start at some other index in the dataset (e.g. 120 candles from latest): " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 34 -v -oo 120 -hrat 1" + TextColors.ENDC + "\n" + \
+		"• Start at some other index and march forward N candles: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 34 -v -oo 120 -sps 10 -hrat 1" + TextColors.ENDC + "\n" + \
+		"• Same, headless and as fast as the CPU allows: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 34 -v -oo 120 -sps 10 -hrat 1 --batch" + TextColors.ENDC + "\n" + \
+		"• Run a series of simulations at the same index: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 23 -v -oo 127 -hrat 1 -ssl 1" + TextColors.ENDC + "\n" + \
+		" "
+
+	parser = argparse.ArgumentParser(description=helpMessage, epilog=textwrap.dedent(""), formatter_class=argparse.RawTextHelpFormatter)
+	parser.add_argument('-s', '--highlight_sigma', dest='highlight_sigma', required=False, help="Paint lines from low sigma regions to the top of the chart. This helps isolate important areas in the histogram.")
+	parser.add_argument('-p', '--sigma_period', dest='sigma_period', required=False, help="The sigma period used to calculate the standard deviation. Default is 17.")
+	parser.add_argument('-hrat', '--show_histo_ratio', dest='show_histo_ratio', required=False, help="Show the histogram ratio lines.")
+	parser.add_argument('-hsd', '--show_histo_sd', dest='show_histo_sd', required=False, help="Show a standard deviation line of the histogram.")
+	parser.add_argument('-hsdp', '--histo_sd_period', dest='histo_sd_period', required=False, help="Histogram standard deviation period. Default is 7.")
+	parser.add_argument('-hsa', '--show_histo_simple_average', dest='show_histo_simple_average', required=False, help="Show a simple average line of the histogram.")
+	parser.add_argument('-hsap', '--histo_simple_average_period', dest='histo_simple_average_period', required=False, help="Histogram simple average period. Default is 9.")
+	parser.add_argument('-ssl', '--sigma_sort_low', dest='sigma_sort_low', required=False, help="The number of samples to use for highlighting the low points in sigma. Default is 40. Higher numbers will add more lines and include a larger range.")
+	parser.add_argument('-oo', '--offset_index_override', dest='offset_index_override', required=False, help="The index of the current data set to begin at. This is helpful if you see a breakout candle somewhere in the past and want to run the simulation with that price being at the far right of the chart.")
+	parser.add_argument('-sps', '--sample_period_size', dest='sample_period_size', required=False, help="The size of the sample set of candles to run a simulation on. Use with offset index override -oo.")
+	parser.add_argument('-psd', '--population_sd', dest='population_sd', action='store_true', help="Use the textbook population standard deviation for the SD lines instead of the original complex square root formula. Charts will shift.")
+	parser.add_argument('-mfi', '--show_mfi', dest='show_mfi', required=False, help="Display both MFI over the chart and MFI standard deviation at bottom.")
+	parser.add_argument('-arc', '--archive', dest='archive', action='store_true', help="Load the window from the deduplicated archive of the dataset's symbol/timeframe instead of the CSV. Build it with --ingest_archive.")
+	parser.add_argument('-et', '--end_time', dest='end_time', required=False, help="With --archive, end the window at this bar time (e.g. 2018-04-13T10:00) instead of the newest bar. -oo still shifts back from it.")
+	parser.add_argument('-ingest', '--ingest_archive', dest='ingest_archive', action='store_true', help="Merge every CSV snapshot into the deduplicated per symbol/timeframe archive, then exit.")
+	parser.add_argument('-tf', '--timeframes', dest='timeframes', required=False, help="Comma separated timeframes in minutes, e.g. 15,30,60,240. Higher timeframes are resampled from the CSV, one simulation runs per timeframe.")
+	parser.add_argument('-sweep', '--sigma_sweep', dest='sigma_sweep', required=False, help="Comma separated sigma periods, e.g. 17,19,23,34. The particles are simulated once per window and the SD/MFI overlays and histogram are rendered for every period. The (periods x candles) indicator matrices are saved next to the histograms.")
+	parser.add_argument('-b', '--batch', dest='batch', action='store_true', help="Headless batch mode: no window, no event polling and no frame pacing, the physics steps as fast as the CPU allows. Frames are only drawn when they are saved.")
+	parser.add_argument('-conv', '--converge', dest='converge', required=False, choices=convergence.MODES, help="Stop the simulation once the tank settles instead of always running the full frame limit: sleeping (fraction of sleeping particles), energy (kinetic energy per particle) or histogram (particle counts per column stop changing).")
+	parser.add_argument('-ct', '--convergence_threshold', dest='convergence_threshold', required=False, help="Threshold for --converge. Defaults: sleeping 0.5, energy 1.0, histogram 0.03.")
+	parser.add_argument('-mf', '--max_frames', dest='max_frames', required=False, help="Maximum number of frames per simulation, the safety cap for --converge. Default is 200.")
+	parser.add_argument('-ckpt', '--checkpoints', dest='checkpoints', action='store_true', help="Save each settled world to ../checkpoints/ and start a run whose window only differs in its newest candles from the nearest checkpoint instead of from scratch.")
+	parser.add_argument('-seed', '--seed', dest='seed', required=False, help="Seed for the particle placement. Checkpoints are only reused between runs with the same seed.")
+	parser.add_argument('-merge', '--merge_candles', dest='merge_candles', action='store_true', help="Hang all candle boxes on one shared static body instead of one body per candle. Less body bookkeeping and broadphase work, the particles settle the same within --benchmark_merge tolerance.")
+	parser.add_argument('-benchmerge', '--benchmark_merge', dest='benchmark_merge', action='store_true', help="Simulate the newest window headless with one body per candle and with merged candles, same seed, print the setup and physics times and how far the particle accumulation differs, then exit.")
+	parser.add_argument('-engine', '--engine', dest='engine', required=False, choices=ENGINES, help="physics (default) simulates the particles with rigid bodies, deposition piles them on the candles with a fast height field model that skips the simulation, for screening many windows.")
+	parser.add_argument('-calibrate', '--calibrate_engine', dest='calibrate_engine', action='store_true', help="Compare the deposition engine's particle accumulation with the physics engine on windows of the newest CSV, print the report, then exit.")
+	parser.add_argument('-ens', '--ensemble', dest='ensemble', required=False, help="Run this many permutations of the newest window in parallel, member i seeded with --seed + i (default seed 1), and draw one histogram from their mean imbalance with the 10%%-90%% band around it. The mean, variance, bands and the per column agreement are saved next to it, then exit. Use -oo to pick the window.")
+	parser.add_argument('-w', '--workers', dest='workers', required=False, help="Worker processes for --ensemble. Default is one per CPU.")
+	parser.add_argument('-live', '--live', dest='live', action='store_true', help="Watch the CSV directory and run a simulation each time a new bar is appended to the newest file. The tank is kept between bars: the candles and the settled particles shift left and only the new candles re-settle.")
+
+	parser.add_argument('-v','--verbose', dest='verbose', action='store_true', help="Explain what is being done.")
+	parser.add_argument('-d','--debug', dest='debug', action='store_true', help="Lower level messages for debugging.")		
+	parser.add_argument('--version', action='version', version='%(prog)s ' + __version__)
+	return parser
 
 # Particle/fluid simulations occur within a Control Volume Tank. 
 # The current settings in this version are tuned to USDJPY 15 and 30 minute chart data.
 class ControlVolumeTank():
 
-	def __init__(self):
+	def __init__(self, pHeadless=None, pArgs=None):
 		print(self.__class__.__name__, __version__)
 		print("Running " + TextColors.HEADERLEFT3 + TextColors.INVERTED + self.__class__.__name__ + " " + \
 			TextColors.ENDC + " version " + __version__ + " of Sekisetsu Method Star Eyes fork.")
 
 		self.dataset_file = '' # overridden
+		self.use_ohlcv_cache = True # memory mapped cache of each CSV in ../cache/ohlcv/, rebuilt whenever the CSV changes, a miss is tail read first
+		self.use_archive = False # read the window from the deduplicated archive, see lib/ohlcv_archive.py
+		self.window_end_time = None # with the archive, the bar time the window ends at, None for the newest bar
+		self.ohlcv = None # set this to already loaded OHLCVData (e.g. from the live watcher) to skip reading the CSV
+		self.indicators = None # StreamingIndicators kept up to date by the live runner, used instead of recomputing the window
+		self.use_indicator_memo = True # offset sweeps slice indicators computed once over the whole file, see lib/indicator_memo.py
+		self.ohlcv_is_tail = False # True when only the trailing rows were read, the memo needs every bar
 		self.save_sequences = True
 		self.particles_birth_count = 0 # overridden
-		self.FRAME_LIMIT = 200 # 200 for production
+		self.FRAME_LIMIT = 200 # 200 for production, with a convergence mode this is the cap
+		self.convergence_mode = None # "sleeping", "energy" or "histogram" to stop once the tank settles, see lib/convergence.py
+		self.convergence_threshold = None # None uses the mode's default
+		self.convergence_check_interval = 5 # frames between convergence checks
+		self.convergence = None # the ConvergenceMonitor of the running simulation
+		self.use_world_checkpoints = False # warm start from settled worlds, see lib/world_checkpoint.py and --checkpoints
+		self.warm_start_frame_limit = 60 # frames a warm started world gets to settle around the candles that changed
+		self.keep_world = False # True keeps the world after game_run so the live runner can roll it to the next bar
+		self.live_settle_frame_limit = 40 # frames a rolled world gets to settle around the new bars, see resume
+		self.warm_started = False
+		self.physics_seed = None # None seeds from the clock
+		self.merge_candle_bodies = False # True hangs every candle box on one shared static body, see --merge_candles
+		self.engine = "physics" # "deposition" places the particles with lib/deposition.py instead of simulating them, see --engine
+		self.particle_birth_columns = [] # the x every heavy and every light particle is born at
+		self.draw_particles = True # False for the ensemble histogram, it has no single particle layout to show
+		self.ensemble_size = 0 # members behind the histogram of an --ensemble run, it's named after them instead of the permutation
 		self.render_frames_directory = "../simulations/"
 		self.render_histogram_directory = "../histograms/"
 		self.code_name = "star_eyes"
@@ -113,7 +205,6 @@ class ControlVolumeTank():
 		self.previous_sdev_vol_y = 850
 		self.standard_dev_vol_start_y = 850
 		self.previous_sd_mfi_y = 800
-		self.standardDevMFI = 0
 
 		self.FRAME_RATE = 24 
 		self.CANDLESTICK_WIDTH = 1
@@ -129,17 +220,18 @@ class ControlVolumeTank():
 		self.price_low = 0
 		self.offset_index = 0 # used for cycling through the T axis
 		self.truncated_dataset_file_name = ""
+		self.timeframe_label = "" # e.g. "_60m" when the dataset was resampled, appended to the output file names
 		self.PAINTABLE_LIMIT = 1268 # used as a canvas limit so there are some venting gaps on L and R side of chart
 		self.HEIGHT_SCALING_FACTOR = 1.1 # set to 1.2 initially. if things are getting truncated, lower this number to fit more into the screen
 		# note: set to negative number to do interesting head-on particle collisions.
 
 		random.seed()
-		pygame.display.init()
 		pygame.font.init()
 		self.fpsclock = pygame.time.Clock()
+		self.headless = False # True runs without a window, event polling or frame pacing, see --batch
 		self.WINDOW_WIDTH = 1280
 		self.WINDOW_HEIGHT = 720
-		self.surf_window = pygame.display.set_mode((self.WINDOW_WIDTH, self.WINDOW_HEIGHT))
+		self.surf_window = None # created by init_display once we know whether we run headless
 		self.font = pygame.font.SysFont("Sans", 12)	
 		self.font_large = pygame.font.SysFont("Sans", 24)	
 		self.cx = self.WINDOW_WIDTH / 2
@@ -153,17 +245,20 @@ class ControlVolumeTank():
 		self.COLOR_LIGHT_PARTICLES = pygame.Color(255, 0, 255)
 		self.COLOR_HISTOGRAM_UP = (0, 146, 255)
 		self.COLOR_HISTOGRAM_DOWN = (255, 0, 255)
+		self.COLOR_HISTOGRAM_BAND_UP = (0, 58, 102)
+		self.COLOR_HISTOGRAM_BAND_DOWN = (102, 0, 102)
 		self.COLOR_ENTRY_SIGNAL = (0, 255, 100)
 		self.COLOR_MONEY_FLOW_INDEX = pygame.Color("green")		
 		self.MOUSE_HINGE_JOINT = -1.0
 		self.edge_boxes = []
 		self.candlestick_boxes = []
+		self.candle_boxes = [] # [w, h, x, y, rot] of every candle body, oldest first
+		self.candle_bodies = [] # the static body of each candle, same order
 		self.heavy_particles = []
 		self.light_particles = []
 		self.standard_dev_list = []
 		self.standard_dev_list_vol = []
 		self.mfi = []
-		self.mfi_calc = []
 		self.mfi_standard_dev = []
 		self.new_x = self.new_x_default_value
 		self.index_counter = 0
@@ -172,6 +267,11 @@ class ControlVolumeTank():
 		self.candleIndex = 0
 		self.highlight_sigma = True # can be overridden by passing in -highlight_sigma argument
 		self.sigma_period = 17 # can be overridden by passing in -sigma_period argument
+		self.sigma_compatible = True # False switches the SD lines to the textbook population standard deviation, see --population_sd
+		self.sigma_sweep_periods = [] # e.g. [17, 19, 23, 34], renders every period from one physics run, see --sigma_sweep
+		self.indicator_source = "" # where init_dataset took the indicator series from: batch, streaming, memo or sweep
+		self.signal_table = None # every painted candle scored by make_histogram, see lib/signal_engine.py
+		self.signals = None # the rows of signal_table that get an entry line
 		self.show_histogram_ratio = True
 		self.show_histogram_standard_dev = False
 		self.show_MFI = False
@@ -184,36 +284,7 @@ class ControlVolumeTank():
 		self.permutation_index = 0 # the outer loop index, this will be appended to file name, and is useful for running multiple simulations on one dataset in order to observe variances in particle distribution
 		self.candlePlusGutterWidth = (self.CANDLESTICK_WIDTH + self.CANDLE_GUTTER)
 
-		helpMessage = 'See README.md and setup_instructions.md for specifics. Here are some commands to try: \n' + \
-			"• Standard deviation of price (SD, yellow line) + Volume SD (blue line) + 100 lowest sigma values highlighted in green: " + TextColors.OKGREEN + 'python cvt_00014.py --sigma_period 17 -hrat 1 -v -ssl 100' + TextColors.ENDC + "\n" + \
-			"• Price SD + lowest sigma values highlighted in green: " + TextColors.OKGREEN + 'python cvt_00014.py --sigma_period 23 --highlight_sigma True -v ' + TextColors.ENDC + "\n" + \
-			"• Price SD + histogram SD of particle distribution: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 19 -v -hrat False -hsd True -hsdp 34" + TextColors.ENDC + "\n" + \
-			"• Price SD + histogram moving average (MA) of particle distribution: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 17 -v -hrat False -hsa True -hsap 23" + TextColors.ENDC + "\n" + \
-			"• Price SD + histogram MA with a larger set of low SD highlighted: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 34 -v -hrat True -ssl 100" + TextColors.ENDC + "\n" + \
-			"• Start at some other index in the dataset (e.g. 120 candles from latest): " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 34 -v -oo 120 -hrat 1" + TextColors.ENDC + "\n" + \
-			"• Start at some other index and march forward N candles: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 34 -v -oo 120 -sps 10 -hrat 1" + TextColors.ENDC + "\n" + \
-			"• Run a series of simulations at the same index: " + TextColors.OKGREEN +  "python cvt_00014.py --sigma_period 23 -v -oo 127 -hrat 1 -ssl 1" + TextColors.ENDC + "\n" + \
-			" "
-
-			
-		parser = argparse.ArgumentParser(description=helpMessage, epilog=textwrap.dedent(""), formatter_class=argparse.RawTextHelpFormatter)
-		parser.add_argument('-s', '--highlight_sigma', dest='highlight_sigma', required=False, help="Paint lines from low sigma regions to the top of the chart. This helps isolate important areas in the histogram.")
-		parser.add_argument('-p', '--sigma_period', dest='sigma_period', required=False, help="The sigma period used to calculate the standard deviation. Default is 17.")
-		parser.add_argument('-hrat', '--show_histo_ratio', dest='show_histo_ratio', required=False, help="Show the histogram ratio lines.")
-		parser.add_argument('-hsd', '--show_histo_sd', dest='show_histo_sd', required=False, help="Show a standard deviation line of the histogram.")
-		parser.add_argument('-hsdp', '--histo_sd_period', dest='histo_sd_period', required=False, help="Histogram standard deviation period. Default is 7.")
-		parser.add_argument('-hsa', '--show_histo_simple_average', dest='show_histo_simple_average', required=False, help="Show a simple average line of the histogram.")
-		parser.add_argument('-hsap', '--histo_simple_average_period', dest='histo_simple_average_period', required=False, help="Histogram simple average period. Default is 9.")
-		parser.add_argument('-ssl', '--sigma_sort_low', dest='sigma_sort_low', required=False, help="The number of samples to use for highlighting the low points in sigma. Default is 40. Higher numbers will add more lines and include a larger range.")
-		parser.add_argument('-oo', '--offset_index_override', dest='offset_index_override', required=False, help="The index of the current data set to begin at. This is helpful if you see a breakout candle somewhere in the past and want to run the simulation with that price being at the far right of the chart.")
-		parser.add_argument('-sps', '--sample_period_size', dest='sample_period_size', required=False, help="The size of the sample set of candles to run a simulation on. Use with offset index override -oo.")
-		parser.add_argument('-mfi', '--show_mfi', dest='show_mfi', required=False, help="Display both MFI over the chart and MFI standard deviation at bottom.")
-
-		parser.add_argument('-v','--verbose', dest='verbose', action='store_true', help="Explain what is being done.")
-		parser.add_argument('-d','--debug', dest='debug', action='store_true', help="Lower level messages for debugging.")		
-		parser.add_argument('--version', action='version', version='%(prog)s ' + __version__)
-
-		args = parser.parse_args()
+		args = pArgs if pArgs is not None else get_argument_parser().parse_args()
 		
 		if args.verbose:
 			self.verbose = True
@@ -233,6 +304,13 @@ class ControlVolumeTank():
 		if args.sigma_period: 
 			self.sigma_period = int( args.sigma_period )
 
+		if args.population_sd:
+			self.sigma_compatible = False
+
+		if args.sigma_sweep:
+			self.sigma_sweep_periods = [int(p) for p in args.sigma_sweep.split(",")]
+			self.sigma_period = self.sigma_sweep_periods[0]
+
 		if args.sigma_sort_low: 
 			self.sigma_sort_low = int( args.sigma_sort_low )
 
@@ -254,12 +332,55 @@ class ControlVolumeTank():
 		if args.offset_index_override:
 			self.offset_index_override = int(args.offset_index_override)
 
+		if args.archive:
+			self.use_archive = True
+
+		if args.end_time:
+			self.window_end_time = args.end_time
+
 		if args.debug and args.verbose:
 			self.print_debug("Running in verbose mode with debug messages.")
 		elif args.debug and not args.verbose:
 			self.print_debug("Running in debug mode.")
 		elif args.verbose and not args.debug:
 			self.print_verbose("Running in verbose mode.")
+
+		if args.batch:
+			self.headless = True
+
+		if args.converge:
+			self.convergence_mode = args.converge
+
+		if args.convergence_threshold:
+			self.convergence_threshold = float(args.convergence_threshold)
+
+		if args.max_frames:
+			self.FRAME_LIMIT = int(args.max_frames)
+
+		if args.checkpoints:
+			self.use_world_checkpoints = True
+
+		if args.seed:
+			self.physics_seed = int(args.seed)
+
+		if args.merge_candles:
+			self.merge_candle_bodies = True
+
+		if args.engine:
+			self.engine = args.engine
+
+		if pHeadless is not None:
+			self.headless = pHeadless
+
+		self.init_display()
+
+	def init_display(self):
+		# headless runs draw into an offscreen surface, there is no window and no event queue
+		if self.headless == True:
+			self.surf_window = pygame.Surface((self.WINDOW_WIDTH, self.WINDOW_HEIGHT))
+		else:
+			pygame.display.init()
+			self.surf_window = pygame.display.set_mode((self.WINDOW_WIDTH, self.WINDOW_HEIGHT))
 	
 	def string_to_bool(self, pArg):
   		if None == pArg:
@@ -271,6 +392,9 @@ class ControlVolumeTank():
 
 	def set_dataset_file(self, pFileName):
 		self.dataset_file = pFileName
+		slashLocation = self.dataset_file.rfind('/') 
+		directory = self.dataset_file[slashLocation+1:]
+		self.truncated_dataset_file_name = directory[:-4] + self.timeframe_label #trim off the '.csv'
 
 	def draw_box(self, x, y, w, h, rot, color):
 		points = [[-w / 2.0, -h / 2.0], [w / 2.0, -h / 2.0], [w / 2.0, h / 2.0], [-w / 2.0, h / 2.0]]
@@ -310,76 +434,179 @@ class ControlVolumeTank():
 	def draw_sd_mfi(self, pCoords):
 		pygame.draw.line(self.surf_window, pygame.Color("gray"), pCoords[0], pCoords[1], 1)
 
-	def init_dataset(self):	
-		csvfile = open(self.dataset_file, 'r')
-		lines = csvfile.readlines() 
-		
-		rowCount = 0
-		for row in lines:
-			rowCount += 1
-		
-		tmpDataSet = []
+	def get_streaming_series(self):
+		# in live mode the newest window's indicators are already up to date, returns False when the batch functions must run
+		if self.indicators is None or self.offset_index != 0 or self.use_archive == True:
+			return False
+		if not self.indicators.matches(self.sigma_period, len(self.dataset), self.sigma_compatible):
+			return False
+
+		count = len(self.dataset)
+		series = [self.indicators.get_series(name, count) for name in ("price_sd", "volume_sd", "mfi", "mfi_y", "mfi_sd")]
+		if any(s is None for s in series):
+			return False
+		self.price_sd_series, self.volume_sd_series, self.mfi_series, self.mfi_y_series, self.mfi_sd_series = series
+		return True
+
+	def get_memoized_series(self):
+		# offset sweeps share one full length computation, returns False when the window is computed on its own
+		if self.use_indicator_memo == False or self.sample_period_size <= 0 or self.use_archive == True or self.ohlcv_is_tail == True:
+			return False
+
+		series = indicator_memo.get_indicator_series(self.dataset_file, self.ohlcv, self.sigma_period, self.sigma_compatible, \
+			self.WINDOW_HEIGHT, self.timeframe_label)
+		self.price_sd_series, self.volume_sd_series, self.mfi_series, self.mfi_y_series, self.mfi_sd_series = series.tail(315, self.offset_index)
+		return True
+
+	def get_sweep_series(self):
+		# every period of --sigma_sweep in one pass, the window starts out drawn with the first period
+		if len(self.sigma_sweep_periods) == 0:
+			return False
+
+		self.sigma_sweep = indicator_memo.get_sigma_sweep(self.dataset, self.sigma_sweep_periods, self.sigma_compatible, self.WINDOW_HEIGHT)
+		row = self.sigma_sweep_periods.index(self.sigma_period)
+		self.price_sd_series, self.volume_sd_series, self.mfi_series, self.mfi_y_series, self.mfi_sd_series = \
+			[self.sigma_sweep[name][row] for name in indicator_memo.SERIES_NAMES]
+		return True
+
+	def scale_indicator_series(self):
+		self.price_sd_series = self.price_sd_series * math.pow(  math.pi*self.get_phi(), 4)
+		self.volume_sd_series = self.volume_sd_series * math.pow(  math.pi*self.get_phi(), 2.5)
+		self.mfi_sd_series = self.mfi_sd_series * math.pow(  math.pi*self.get_phi(), 2.97)
+
+	def reset_indicator_lines(self):
+		self.standard_dev_list = []
+		self.standard_dev_list_vol = []
+		self.mfi = []
+		self.mfi_standard_dev = []
+		self.previous_sdev_y = self.standard_dev_start_y
+		self.previous_money_flow_y = self.standard_dev_start_y
+		self.previous_sdev_vol_y = self.standard_dev_vol_start_y
+		self.previous_sd_mfi_y = 800
 
-		# this reverse orders the orig data so we can paint from left to right with it
-		startIndex = rowCount - self.offset_index - 315
+	def select_sigma_period(self, pPeriod):
+		# redraws the SD and MFI lines for another period of the sweep, the candles and particles are untouched
+		self.sigma_period = pPeriod
+		self.get_sweep_series()
+		self.scale_indicator_series()
 
-		for i in range( startIndex, rowCount - self.offset_index ):
-			tmpDataSet.append(lines[i])
-		
-		self.dataset = tmpDataSet
+		paintedCount = len(self.standard_dev_list)
+		self.reset_indicator_lines()
+		for index in range(0, paintedCount):
+			self.append_indicator_lines(index, self.new_x_default_value + index * self.candlePlusGutterWidth)
 
-		tmpList = []
-		tmpVolList = []
-		tmpCount = 0
-		tmpMFI = []
+	def needs_full_history(self):
+		# offset sweeps compute the indicators once over every bar, a single window only needs its own rows
+		return self.use_indicator_memo == True and self.sample_period_size > 0
 
-		for row in self.dataset:
-			# if tmpCount > 0:			
-			# this is to determine the min/max
-			# tmpTruncatedRow = row[1:4] # works for dukascopy
-			rowList = row.split(",")
-			# self.print_debug(rowList)
-			tmpTruncatedRow = rowList[2:6] # works for metatrader					
+	def init_dataset(self):	
+		# parse the CSV once into typed columns, every consumer below reads these arrays
+		if self.ohlcv is not None:
+			pass # handed in by the runner
+		elif self.use_archive == True:
+			# CSV_WRITER names map to their symbol/timeframe, any other CSV is archived under its own name
+			seriesName = csv_catalog.get_series_name(self.dataset_file)
+			self.ohlcv = ohlcv_archive.OHLCVArchive().load(seriesName)
+			if len(self.ohlcv) == 0:
+				sys.exit("No archived bars for " + seriesName + ", build the archive with --ingest_archive first.")
+		elif self.use_ohlcv_cache == True and (self.needs_full_history() == True or ohlcv_cache.is_cached(self.dataset_file)):
+			self.ohlcv = ohlcv_cache.load_ohlcv_cached(self.dataset_file)
+		else:
+			# a single window on an uncached CSV, only read the trailing rows it needs
+			cacheKey = ohlcv_cache.get_cache_key(self.dataset_file)
+			self.ohlcv, rowsRead = csv_schema.load_ohlcv_tail(self.dataset_file, self.offset_index + 315)
+			self.ohlcv_is_tail = True
+			self.print_verbose( str(rowsRead) + " rows read from the end of " + self.dataset_file )
+
+			# the next runs on this CSV (the run loop, ensemble members) map the cache instead, if it held still while we read it
+			if self.use_ohlcv_cache == True and ohlcv_cache.build_cache_if_unchanged(self.dataset_file, cacheKey) == True:
+				self.print_verbose( "OHLCV cache built for " + self.dataset_file )
+
+		# keep the last 315 candles, shifted back by the offset index, so we can paint from left to right with it
+		if self.use_archive == True:
+			self.dataset = self.ohlcv.window_ending_at(self.window_end_time, 315, self.offset_index) if self.window_end_time else self.ohlcv.tail(315, self.offset_index)
+		else:
+			self.dataset = self.ohlcv.tail(315, self.offset_index)
 
-			if tmpTruncatedRow != []:
-				tmpList.append(  max(tmpTruncatedRow)  )
-				tmpList.append(  min(tmpTruncatedRow)  )
+		self.prepare_window() # game_start builds the candle bodies, or takes them from a checkpoint
 
-			tmpTruncatedRow = rowList[6:7]
-			if tmpTruncatedRow != []:
-				tmpVolList.append(  float( tmpTruncatedRow[0].strip() )  )
+		self.print_verbose( str(self.candleIndex) + " records in data set" )
 
-		self.DATASET_LOWEST = int( round( float( min(tmpList))  ) ) -1
-		self.DATASET_HIGHEST = int( round( float( max(tmpList))  ) ) +1
+		self.set_dataset_file(self.dataset_file)
+		self.print_verbose( self.truncated_dataset_file_name )
+
+	def prepare_window(self):
+		# chart scaling, indicator series, overlay lines and candle boxes of self.dataset, the physics bodies come after
+		self.DATASET_LOWEST = int( round( float( min(self.dataset.low.min(), self.dataset.open.min(), self.dataset.close.min()) ) ) ) -1
+		self.DATASET_HIGHEST = int( round( float( max(self.dataset.high.max(), self.dataset.open.max(), self.dataset.close.max()) ) ) ) +1
 
-		self.DATASET_VOLUME_LOWEST = int( round( float( min(tmpVolList) * self.DATASET_LOWEST )  ) ) -1
-		self.DATASET_VOLUME_HIGHEST = int( round( float( max(tmpVolList) * self.DATASET_HIGHEST )  ) ) +1
+		self.DATASET_VOLUME_LOWEST = int( round( float( self.dataset.volume.min() * self.DATASET_LOWEST )  ) ) -1
+		self.DATASET_VOLUME_HIGHEST = int( round( float( self.dataset.volume.max() * self.DATASET_HIGHEST )  ) ) +1
 
 		self.DATASET_MFI_HIGHEST = 100 #self.DATASET_HIGHEST * self.DATASET_VOLUME_HIGHEST
 		self.DATASET_MFI_LOWEST = 0 #self.DATASET_LOWEST * self.DATASET_VOLUME_LOWEST
 
-		# firstRowRead = 0
-		for row in self.dataset:
-			self.paint_candle(row) # returns 0 if row volume is empty
-			self.candleIndex += 1
+		if self.get_sweep_series() == True:
+			self.indicator_source = "sweep"
+		elif self.get_streaming_series() == True:
+			self.indicator_source = "streaming"
+		elif self.get_memoized_series() == True:
+			self.indicator_source = "memo"
+		else:
+			self.indicator_source = "batch"
+			# standard deviation series for the whole window in one call each, paint_candle just indexes them
+			self.price_sd_series = sdef.getRollingStandardDeviation(self.dataset.close, self.sigma_period, self.sigma_compatible)
+			self.volume_sd_series = sdef.getRollingStandardDeviation(self.dataset.volume, self.sigma_period, self.sigma_compatible, True)
 
-		self.print_verbose( str(self.candleIndex) + " records in data set" )
+			# MFI, its chart position and its SD for the whole window, the renderer and the signal logic read these arrays
+			self.mfi_series = money_flow_index.getMoneyFlowIndex(self.dataset.high, self.dataset.low, self.dataset.volume, self.sigma_period)
+			self.mfi_y_series = self.interpolate_mfi(self.mfi_series)
+			self.mfi_sd_series = money_flow_index.getMoneyFlowIndexStandardDeviation(self.mfi_y_series, self.sigma_period)
 
-		slashLocation = self.dataset_file.rfind('/') 
-		directory = self.dataset_file[slashLocation+1:]
-		self.truncated_dataset_file_name = directory[:-4] #trim off the '.csv'
-		self.print_verbose( self.truncated_dataset_file_name )
+		self.scale_indicator_series()
+
+		# firstRowRead = 0
+		for index in range(0, len(self.dataset)):
+			self.paint_candle(index) # returns 0 once the candles reach the paintable limit
+			self.candleIndex += 1
 
 	def game_start(self):
 		
+		if self.physics_seed is not None:
+			random.seed(self.physics_seed)
+
 		self.world = ep_world_create()
 		ep_world_set_sleeping(self.world, True, 30, 0, 0.002, 0.0001)
 		ep_world_set_settings(self.world, 1.0 / 4.0, 20, 10, 0.1, 0.5, 0, 0.5, 1)
 
 		self.init_dataset()
+		self.MOUSE_HINGE_JOINT = -1.0
 
+		# physics boundaries of the stage, AKA the Control Volume Tank.
+		# floor, left wall, right wall, ceiling as [w, h, x, y, rot]
+		walls = [
+			[self.WINDOW_WIDTH - self.CONTAINER_WALLS_WIDTH, self.CONTAINER_WALLS_WIDTH, self.WINDOW_WIDTH / 2, self.WINDOW_HEIGHT - self.CONTAINER_WALLS_WIDTH, math.radians(0)],
+			[self.CONTAINER_WALLS_WIDTH, self.WINDOW_HEIGHT - self.CONTAINER_WALLS_WIDTH, 0, self.WINDOW_HEIGHT / 2, math.radians(0)],
+			[self.CONTAINER_WALLS_WIDTH, self.WINDOW_HEIGHT - self.CONTAINER_WALLS_WIDTH, self.WINDOW_WIDTH - self.CONTAINER_WALLS_WIDTH, self.WINDOW_HEIGHT / 2, math.radians(0)],
+			[self.WINDOW_WIDTH - self.CONTAINER_WALLS_WIDTH, self.CONTAINER_WALLS_WIDTH, self.WINDOW_WIDTH / 2, self.CONTAINER_WALLS_WIDTH, math.radians(0)]]
+		self.edge_boxes.extend(walls)
+
+		# a matching checkpoint is looked up before anything is built, its world already holds the walls and settled particles
+		self.warm_started = self.warm_start()
+		if self.warm_started == False:
+			self.build_world(walls)
+		if self.engine == "deposition":
+			self.deposit_particles()
+
+		self.convergence = None
+		self.particle_masses = None
+		if self.convergence_mode is not None:
+			self.convergence = convergence.ConvergenceMonitor(self.convergence_mode, self.convergence_threshold)
+
+	def build_world(self, pWalls):
+		# cold start: candles, mouse, walls and particles in the order the body ids always had
+		self.candle_bodies = self.create_candle_bodies(self.candle_boxes)
 		self.mouseParticleId = self.get_static_body_id()
-		self.MOUSE_HINGE_JOINT = -1.0
 		particlePosition_X = 10
 
 		# HOW TO SET THE FRICTIONS...
@@ -389,58 +616,18 @@ class ControlVolumeTank():
 		# 0: normal surface velocity.
 		# 0: tangential surface velocity.
 
-		# physics boundaries of the stage, AKA the Control Volume Tank.
-		# MAKE FLOOR
-		tmpW = self.WINDOW_WIDTH - self.CONTAINER_WALLS_WIDTH
-		tmpH = self.CONTAINER_WALLS_WIDTH
-		tmpX = self.WINDOW_WIDTH / 2
-		tmpY = self.WINDOW_HEIGHT - self.CONTAINER_WALLS_WIDTH
-
+		# physics boundaries of the stage, AKA the Control Volume Tank: floor, left wall, right wall and ceiling
 		# ep_shape_create_box(world_id, body_id, w, h, x, y, rot, density)
-		tmpBodyId = self.get_static_body_id()
-		self.edge_boxes.append([tmpW, tmpH, tmpX, tmpY, math.radians(0)])
-		shape = ep_shape_create_box(self.world, tmpBodyId, tmpW, tmpH, tmpX, tmpY, math.radians(0), 1)
-		ep_shape_set_collision(self.world, tmpBodyId, shape, 1, 1, 0)
-		ep_shape_set_material(self.world, tmpBodyId, shape, self.COEFFICIENT_RESTITUTION, self.FRICTION, 0, 0)
-
-		# LEFT WALL
-		tmpW = self.CONTAINER_WALLS_WIDTH
-		tmpH = self.WINDOW_HEIGHT - self.CONTAINER_WALLS_WIDTH
-		tmpX = 0
-		tmpY = self.WINDOW_HEIGHT / 2
-
-		tmpBodyId = self.get_static_body_id()
-		self.edge_boxes.append([tmpW, tmpH, tmpX, tmpY, math.radians(0)])
-		shape = ep_shape_create_box(self.world, tmpBodyId, tmpW, tmpH, tmpX, tmpY, math.radians(0), 1)
-		ep_shape_set_collision(self.world, tmpBodyId, shape, 1, 1, 0)
-		ep_shape_set_material(self.world, tmpBodyId, shape, self.COEFFICIENT_RESTITUTION, self.FRICTION, 0, 0)
-
-		# RIGHT WALL
-		tmpW = self.CONTAINER_WALLS_WIDTH
-		tmpH = self.WINDOW_HEIGHT - self.CONTAINER_WALLS_WIDTH
-		tmpX = self.WINDOW_WIDTH - self.CONTAINER_WALLS_WIDTH
-		tmpY = self.WINDOW_HEIGHT / 2
-
-		tmpBodyId = self.get_static_body_id()
-		self.edge_boxes.append([tmpW, tmpH, tmpX, tmpY, math.radians(0)])
-		shape = ep_shape_create_box(self.world, tmpBodyId, tmpW, tmpH, tmpX, tmpY, math.radians(0), 1)
-		ep_shape_set_collision(self.world, tmpBodyId, shape, 1, 1, 0)
-		ep_shape_set_material(self.world, tmpBodyId, shape, self.COEFFICIENT_RESTITUTION, self.FRICTION, 0, 0)
-
-		# MAKE CEILING
-		tmpW = self.WINDOW_WIDTH - self.CONTAINER_WALLS_WIDTH
-		tmpH = self.CONTAINER_WALLS_WIDTH
-		tmpX = self.WINDOW_WIDTH / 2
-		tmpY = self.CONTAINER_WALLS_WIDTH
-
-		tmpBodyId = self.get_static_body_id()
-		self.edge_boxes.append([tmpW, tmpH, tmpX, tmpY, math.radians(0)])
-		shape = ep_shape_create_box(self.world, tmpBodyId, tmpW, tmpH, tmpX, tmpY, math.radians(0), 1)
-		ep_shape_set_collision(self.world, tmpBodyId, shape, 1, 1, 0)
-		ep_shape_set_material(self.world, tmpBodyId, shape, self.COEFFICIENT_RESTITUTION, self.FRICTION, 0, 0)
+		for box in pWalls:
+			tmpBodyId = self.get_static_body_id()
+			shape = ep_shape_create_box(self.world, tmpBodyId, box[0], box[1], box[2], box[3], box[4], 1)
+			ep_shape_set_collision(self.world, tmpBodyId, shape, 1, 1, 0)
+			ep_shape_set_material(self.world, tmpBodyId, shape, self.COEFFICIENT_RESTITUTION, self.FRICTION, 0, 0)
 
 		# GENERATE PARTICLES
-		particleCount = 0
+		self.heavy_particles = []
+		self.light_particles = []
+		self.particle_birth_columns = []
 		for i in range(0, self.particles_birth_count):
 
 			# HEAVY PARTICLES
@@ -458,11 +645,11 @@ class ControlVolumeTank():
 			ep_body_set_position(self.world, tmpId, particlePosition_X, 10, math.radians(tmpRadian))
 			ep_body_set_gravity(self.world, tmpId, 0, 1.0)
 			self.heavy_particles.append(tmpId)
-			particleCount += 1
+			self.particle_birth_columns.append(particlePosition_X)
 
 			# LIGHTWEIGHT PARTICLES
 			tmpId = self.get_dynamic_body_id()
-			shape = self.get_particle_shape(tmpId) 
+			shape = self.get_particle_shape(tmpId)
 			ep_shape_set_collision(self.world, tmpId, shape, 1, 1, 0)
 			ep_shape_set_material(self.world, tmpId, shape, self.COEFFICIENT_RESTITUTION, self.FRICTION, 0, 0)
 			ep_body_calculate_mass(self.world, tmpId)
@@ -470,7 +657,81 @@ class ControlVolumeTank():
 			ep_body_set_position(self.world, tmpId, particlePosition_X, self.WINDOW_HEIGHT-10, math.radians(tmpRadian))
 			ep_body_set_gravity(self.world, tmpId, 0, -1.0)
 			self.light_particles.append(tmpId)
-			particleCount += 1
+
+	def get_checkpoint_key(self):
+		# checkpoints are shared between snapshots of the same series, never between different physics
+		symbol, timeframe, snapshotTime = csv_catalog.parse_snapshot_name(self.dataset_file)
+		series = (symbol, timeframe) if symbol is not None else os.path.basename(self.dataset_file)
+		settings = {"particles": self.particles_birth_count, "diameter": self.PARTICLE_DIAMETER, "shape": self.PARTICLE_SHAPE_MODE, \
+			"candle_width": self.CANDLESTICK_WIDTH, "gutter": self.CANDLE_GUTTER, "restitution": self.COEFFICIENT_RESTITUTION, \
+			"friction": self.FRICTION, "width": self.WINDOW_WIDTH, "height": self.WINDOW_HEIGHT, "scaling": self.HEIGHT_SCALING_FACTOR, \
+			"merged_candles": self.merge_candle_bodies}
+		return world_checkpoint.get_key((series, self.timeframe_label), settings, self.physics_seed)
+
+	def warm_start(self):
+		# continues in a settled world holding this window's candles, shifted left by the bars added since, returns False for a cold start
+		if self.use_world_checkpoints == False or self.engine != "physics":
+			return False
+
+		timestamps = world_checkpoint.get_timestamps(self.dataset.timestamps[:len(self.candle_boxes)])
+		checkpoint, matchedCount = world_checkpoint.find_checkpoint(self.get_checkpoint_key(), timestamps, world_checkpoint.get_geometry(self.candle_boxes))
+		if checkpoint is None:
+			return False
+
+		# nothing is built yet, the checkpoint's world brings the walls, the particles and its candles
+		ep_world_unserialize(self.world, checkpoint.world_data)
+		ep_world_set_sleeping(self.world, True, 30, 0, 0.002, 0.0001)
+		ep_world_set_settings(self.world, 1.0 / 4.0, 20, 10, 0.1, 0.5, 0, 0.5, 1)
+		self.heavy_particles = list(checkpoint.bodies["heavy"])
+		self.light_particles = list(checkpoint.bodies["light"])
+		self.mouseParticleId = checkpoint.bodies["mouse"]
+
+		# rolled to this window like live mode rolls to a new bar, the candles that changed are rebuilt and the particles follow
+		oldBoxes = [list(box) + [math.radians(0)] for box in checkpoint.geometry]
+		shift, keptCount = self.reuse_candles(np.array(checkpoint.timestamps, dtype="datetime64[m]"), oldBoxes, list(checkpoint.bodies["candles"]))
+
+		self.FRAME_LIMIT = min(self.FRAME_LIMIT, self.warm_start_frame_limit)
+		self.print_verbose( "Warm start, shifted " + str(shift) + " candles, " + str(len(self.candle_boxes) - matchedCount) + " candles changed since the checkpoint" )
+		return True
+
+	def save_world_checkpoint(self):
+		if self.use_world_checkpoints == False or self.engine != "physics":
+			return
+		bodies = {"candles": list(self.candle_bodies), "heavy": list(self.heavy_particles), "light": list(self.light_particles), "mouse": self.mouseParticleId}
+		checkpoint = world_checkpoint.WorldCheckpoint(self.get_checkpoint_key(), world_checkpoint.get_timestamps(self.dataset.timestamps[:len(self.candle_boxes)]), \
+			world_checkpoint.get_geometry(self.candle_boxes), bodies, ep_world_serialize(self.world))
+		self.print_verbose( "World checkpoint saved to " + world_checkpoint.save_checkpoint(checkpoint) )
+
+	def get_convergence_measure(self):
+		particles = self.heavy_particles + self.light_particles
+		# particles squeezed through the thin walls keep falling forever, they never sleep or come to rest
+		x, y = self.get_particle_positions(particles)
+		inside = (x >= 0) & (x < self.WINDOW_WIDTH) & (y >= 0) & (y < self.WINDOW_HEIGHT)
+		if self.convergence_mode == "sleeping":
+			return np.mean(np.array([ep_body_is_sleeping(self.world, b) for b in particles])[inside]) if inside.any() else 1.0
+
+		if self.convergence_mode == "energy":
+			if self.particle_masses is None:
+				self.particle_masses = np.array([ep_body_get_mass(self.world, b) for b in particles])
+			xVelocities = np.array([ep_body_get_xvel_center(self.world, b) for b in particles])
+			yVelocities = np.array([ep_body_get_yvel_center(self.world, b) for b in particles])
+			return convergence.get_kinetic_energy(self.particle_masses[inside], xVelocities[inside], yVelocities[inside])
+
+		# heavy and light bands side by side, a particle changing sides counts as a change too
+		heavyCount = len(self.heavy_particles)
+		return np.concatenate([
+			convergence.get_column_counts(x[:heavyCount], self.WINDOW_WIDTH, convergence.HISTOGRAM_BAND_WIDTH),
+			convergence.get_column_counts(x[heavyCount:], self.WINDOW_WIDTH, convergence.HISTOGRAM_BAND_WIDTH)])
+
+	def has_converged(self):
+		# checked every convergence_check_interval frames, FRAME_LIMIT stays the cap
+		frame = self.index_counter + 1
+		if self.convergence is None or frame % self.convergence_check_interval != 0:
+			return False
+		if self.convergence.update(frame, self.get_convergence_measure()) == False:
+			return False
+		self.print_verbose( "Tank settled after " + str(frame) + " frames (" + self.convergence_mode + " " + str(self.convergence.last_value) + ")" )
+		return True
 
 	def get_particle_shape(self, tmpId):
 		# ep_shape_create_circle method API...
@@ -484,24 +745,19 @@ class ControlVolumeTank():
 		else: #default square
 			return ep_shape_create_box(self.world, tmpId, self.PARTICLE_DIAMETER, self.PARTICLE_DIAMETER, 0, 0, 0, 1)
 
-	def paint_candle(self, pRow):
+	def paint_candle(self, pIndex):
 
 		if self.new_x >= self.PAINTABLE_LIMIT: # no matter the record count, limit candles to window width
 			return 0
 
-		if pRow == []:
-			return 0
-
-		timestamp = pRow[0][0]
+		timestamp = self.dataset.timestamps[pIndex]
 		self.print_debug(timestamp)
 		
-		# for dukascopy the rows are 1 thru 4
-		# for metatrader it's 2 through 5
-		priceOpen = self.interpolate(float(pRow.split(",")[2]))
-		priceHigh = self.interpolate(float(pRow.split(",")[3]))
-		priceLow = self.interpolate(float(pRow.split(",")[4]))
-		priceClose = self.interpolate(float(pRow.split(",")[5]))
-		volume = self.interpolate_volume(float(pRow.split(",")[6]))
+		priceOpen = self.interpolate(self.dataset.open[pIndex])
+		priceHigh = self.interpolate(self.dataset.high[pIndex])
+		priceLow = self.interpolate(self.dataset.low[pIndex])
+		priceClose = self.interpolate(self.dataset.close[pIndex])
+		volume = self.interpolate_volume(self.dataset.volume[pIndex])
 
 		'''
 		experiment: use open/close rather than high low
@@ -527,69 +783,7 @@ class ControlVolumeTank():
 		if self.DATASET_LOWEST == priceLow:
 			self.DATASET_LOWEST_INDEX = self.candleIndex
 		
-		# PRICE STANDARD DEVIATION
-		sdSet = self.get_last_n_prices(self.candleIndex)
-		standardDev = sdef.getStandardDeviation(sdSet).real
-		standardDev *= (math.pow(  math.pi*self.get_phi(), 4) )
-		
-		self.standard_dev_list.append([[self.new_x-self.candlePlusGutterWidth, self.previous_sdev_y], [self.new_x, self.standard_dev_start_y-standardDev]])
-		self.previous_sdev_y = self.standard_dev_start_y-standardDev			
-
-		# VOLUME SD
-		sdSetVol = self.get_last_n_volumes(self.candleIndex)
-		standardDevVol = sdef.getStandardDeviation(sdSetVol).real
-		standardDevVol *= (math.pow(  math.pi*self.get_phi(), 2.5) )
-
-		self.standard_dev_list_vol.append([[self.new_x-self.candlePlusGutterWidth, self.previous_sdev_vol_y], [self.new_x, self.standard_dev_vol_start_y-standardDevVol]])
-
-		# MONEY FLOW INDEX 		
-		positive_money_flow = 0 
-		negative_money_flow = 0 
-
-		highPriceSet = self.get_last_n_high_prices(self.candleIndex)
-		lowPriceSet = self.get_last_n_low_prices(self.candleIndex)
-
-		# sdSet is a present to past ordered list
-		# so we need to loop it in reverse
-
-		# this example uses high and low
-		# magicNumber = 1/137
-		# for i, k in reversed( list(enumerate(sdSet)) ):
-		# 	if i > 0:
-		# 		if highPriceSet[i] > highPriceSet[i-1]:
-		# 			positive_money_flow += highPriceSet[i] * sdSetVol[i] # * (1+magicNumber)
-
-		# 		if lowPriceSet[i] < lowPriceSet[i-1]:
-		# 			negative_money_flow += lowPriceSet[i] * sdSetVol[i] # * (1+magicNumber)
-
-		for i, k in reversed( list(enumerate(sdSet)) ):
-			if i > 0:
-				if highPriceSet[i] > highPriceSet[i-1]:
-					positive_money_flow += highPriceSet[i] * sdSetVol[i]
-
-				if lowPriceSet[i] < lowPriceSet[i-1]:
-					negative_money_flow += lowPriceSet[i] * sdSetVol[i]
-
-		money_flow_index = 100 * ( positive_money_flow / ( positive_money_flow + negative_money_flow) )
-		newMfCalc = self.interpolate_mfi( money_flow_index )
-
-		# RAW MFI
-		self.mfi.append( [[self.new_x-self.candlePlusGutterWidth, self.previous_money_flow_y], [self.new_x, self.standard_dev_vol_start_y - newMfCalc], [priceHigh, priceLow]] )
-		self.previous_money_flow_y = self.standard_dev_vol_start_y - newMfCalc
-		
-		# SD MFI
-		mfiSDAdjust = self.WINDOW_HEIGHT + 150
-		self.mfi_calc.append( newMfCalc )
-		if (self.candleIndex >= self.sigma_period):
-			sdSetMFI = self.mfi_calc[ -self.sigma_period:-1 ]
-			self.standardDevMFI = sdef.getStandardDeviation(sdSetMFI).real
-			self.standardDevMFI *= (math.pow(  math.pi*self.get_phi(), (2.97)) )
-
-		self.mfi_standard_dev.append( [[self.new_x-self.candlePlusGutterWidth, self.previous_sd_mfi_y], [self.new_x, mfiSDAdjust - self.standardDevMFI]] )
-		self.previous_sd_mfi_y = mfiSDAdjust - self.standardDevMFI
-
-		# VOLUME SD
-		self.previous_sdev_vol_y = self.standard_dev_vol_start_y - standardDevVol
+		self.append_indicator_lines(pIndex, self.new_x)
 
 		# experimental, use to filter out zero volume periods
 		# if volume == 0:
@@ -602,134 +796,93 @@ class ControlVolumeTank():
 		newY = ((candleHeight/2)) + priceLow
 		candleHeight = abs(candleHeight)
 
-		tmpBodyId = self.get_static_body_id()
-		self.edge_boxes.append([self.CANDLESTICK_WIDTH, candleHeight, self.new_x, newY, math.radians(0)])
-		shape = ep_shape_create_box(self.world, tmpBodyId, self.CANDLESTICK_WIDTH, candleHeight, self.new_x, newY, math.radians(0), 1)
+		box = [self.CANDLESTICK_WIDTH, candleHeight, self.new_x, newY, math.radians(0)]
+		self.edge_boxes.append(box)
+		self.candle_boxes.append(box) # init_dataset creates the bodies once every candle is laid out
 		
 		# self.price_high = priceHigh + candleHeight/2
 		# self.price_low = newY
 
+		# advance the x
+		self.new_x += self.candlePlusGutterWidth
+
+		return 1
+
+	def create_candle_bodies(self, pBoxes):
+		# one body id per box, merged candles share one id
+		if self.merge_candle_bodies == True:
+			if len(pBoxes) == 0:
+				return []
+			tmpBodyId = self.get_static_body_id()
+			for box in pBoxes:
+				self.create_candle_body(box, tmpBodyId)
+			return [tmpBodyId] * len(pBoxes)
+		return [self.create_candle_body(box) for box in pBoxes]
+
+	def create_candle_body(self, pBox, pBodyId=None):
+		# a static body of its own, or one more shape on pBodyId for merged candles
+		tmpBodyId = self.get_static_body_id() if pBodyId is None else pBodyId
+		shape = ep_shape_create_box(self.world, tmpBodyId, pBox[0], pBox[1], pBox[2], pBox[3], pBox[4], 1)
 		ep_shape_set_collision(self.world, tmpBodyId, shape, 1, 1, 0)
 		tmpCoef = 2
 		tmpFric = 1
 		ep_shape_set_material(self.world, tmpBodyId, shape, tmpCoef, tmpFric, 0, 0)
+		return tmpBodyId
 
-		# advance the x
-		self.new_x += self.candlePlusGutterWidth
+	def destroy_candle_bodies(self, pBodies):
+		for body in sorted(set(pBodies)):
+			ep_body_destroy(self.world, body)
 
-		return 1
+	def append_indicator_lines(self, pIndex, pX):
+		# the overlay line segments of one candle, they only depend on the indicator series, not on the physics
+		priceHigh = self.interpolate(self.dataset.high[pIndex])
+		priceLow = self.interpolate(self.dataset.low[pIndex])
+
+		# PRICE STANDARD DEVIATION
+		standardDev = self.price_sd_series[pIndex]
+		
+		self.standard_dev_list.append([[pX-self.candlePlusGutterWidth, self.previous_sdev_y], [pX, self.standard_dev_start_y-standardDev]])
+		self.previous_sdev_y = self.standard_dev_start_y-standardDev			
+
+		# VOLUME SD
+		standardDevVol = self.volume_sd_series[pIndex]
+
+		self.standard_dev_list_vol.append([[pX-self.candlePlusGutterWidth, self.previous_sdev_vol_y], [pX, self.standard_dev_vol_start_y-standardDevVol]])
+
+		# MONEY FLOW INDEX, see lib/money_flow_index.py
+		newMfCalc = self.mfi_y_series[pIndex]
+
+		# RAW MFI
+		self.mfi.append( [[pX-self.candlePlusGutterWidth, self.previous_money_flow_y], [pX, self.standard_dev_vol_start_y - newMfCalc], [priceHigh, priceLow]] )
+		self.previous_money_flow_y = self.standard_dev_vol_start_y - newMfCalc
+		
+		# SD MFI
+		mfiSDAdjust = self.WINDOW_HEIGHT + 150
+		standardDevMFI = self.mfi_sd_series[pIndex]
+
+		self.mfi_standard_dev.append( [[pX-self.candlePlusGutterWidth, self.previous_sd_mfi_y], [pX, mfiSDAdjust - standardDevMFI]] )
+		self.previous_sd_mfi_y = mfiSDAdjust - standardDevMFI
+
+		# VOLUME SD
+		self.previous_sdev_vol_y = self.standard_dev_vol_start_y - standardDevVol
 
 	def get_x_location_of_candle(self, pIndex):
-		tmpAdd = self.new_x_default_value
-		for i in range(0, pIndex):
-			tmpAdd += (self.CANDLESTICK_WIDTH + self.CANDLE_GUTTER)
-		return tmpAdd
-
-	def get_last_n_prices(self, pIndex):
-		tmpList = []
-		returnList = []
-		dsSubset = []
-		lookback = self.sigma_period
-
-		dsSubset.append( self.dataset[pIndex] )
-		try:
-			for i in range(1, lookback):
-				dsSubset.append( self.dataset[pIndex-i] )
-			
-		except Exception as e:
-			pass
-
-		for i in range(0, len(dsSubset)):
-			# priceOpen = float(dsSubset[i].split(",")[2])
-			# priceHigh = float(dsSubset[i].split(",")[3])
-			# priceLow = float(dsSubset[i].split(",")[4])
-			priceClose = float(dsSubset[i].split(",")[5])
-			# tmpList.append(priceOpen)
-			# tmpList.append(priceHigh)
-			# tmpList.append(priceLow)
-			tmpList.append(priceClose) # note: just using the close makes for a bit spikier, low notches are more defined
-
-		return tmpList
-
-	def get_last_n_high_prices(self, pIndex):
-		tmpList = []
-		returnList = []
-		dsSubset = []
-		lookback = self.sigma_period
-
-		dsSubset.append( self.dataset[pIndex] )
-		try:
-			for i in range(1, lookback):
-				dsSubset.append( self.dataset[pIndex-i] )
-			
-		except Exception as e:
-			pass
-
-		for i in range(0, len(dsSubset)):
-			# priceOpen = float(dsSubset[i].split(",")[2])
-			priceHigh = float(dsSubset[i].split(",")[3])
-			# priceLow = float(dsSubset[i].split(",")[4])
-			# priceClose = float(dsSubset[i].split(",")[5])
-			# tmpList.append(priceOpen)
-			tmpList.append(priceHigh)
-			# tmpList.append(priceLow)
-			# tmpList.append(priceClose)
-
-		return tmpList
-
-	def get_last_n_low_prices(self, pIndex):
-		tmpList = []
-		returnList = []
-		dsSubset = []
-		lookback = self.sigma_period
-
-		dsSubset.append( self.dataset[pIndex] )
-		try:
-			for i in range(1, lookback):
-				dsSubset.append( self.dataset[pIndex-i] )
-			
-		except Exception as e:
-			pass
-
-		for i in range(0, len(dsSubset)):
-			# priceOpen = float(dsSubset[i].split(",")[2])
-			# priceHigh = float(dsSubset[i].split(",")[3])
-			priceLow = float(dsSubset[i].split(",")[4])
-			# priceClose = float(dsSubset[i].split(",")[5])
-			# tmpList.append(priceOpen)
-			# tmpList.append(priceHigh)
-			tmpList.append(priceLow)
-			# tmpList.append(priceClose)
-
-		return tmpList
-
-	def get_last_n_volumes(self, pIndex):
-		tmpList = []
-		returnList = []
-		dsSubset = []
-		lookback = self.sigma_period
-
-		dsSubset.append( self.dataset[pIndex] )
-		try:
-			for i in range(1, lookback):
-				dsSubset.append( self.dataset[pIndex-i] )
-			
-		except Exception as e:
-			pass
-
-		for i in range(0, len(dsSubset)):
-			# priceOpen = float(dsSubset[i].split(",")[2])
-			# priceHigh = float(dsSubset[i].split(",")[3])
-			# priceLow = float(dsSubset[i].split(",")[4])
-			# priceClose = float(dsSubset[i].split(",")[5])
-			volume = int(dsSubset[i].split(",")[6])
-			# tmpList.append(priceOpen)
-			# tmpList.append(priceHigh)
-			# tmpList.append(priceLow)
-			# tmpList.append(priceClose)
-			tmpList.append(volume)
-
-		return tmpList
+		return self.new_x_default_value + pIndex * (self.CANDLESTICK_WIDTH + self.CANDLE_GUTTER)
+
+	def get_candle_index(self):
+		# candle <-> pixel column <-> timestamp for the painted candles
+		return signal_engine.CandleIndex(self.dataset.timestamps, self.new_x_default_value, self.CANDLESTICK_WIDTH + self.CANDLE_GUTTER, \
+			len(self.standard_dev_list))
+
+	def get_signals(self, pImbalanceRatios):
+		# fills signal_table with every painted candle and returns the ones that get an entry line
+		index = self.get_candle_index()
+		order = None
+		if self.indicator_source == "streaming":
+			# the live tracker already keeps the window's candles sorted by SD
+			order = [i for i, value in self.indicators.get_lowest_sigma(len(self.dataset), len(self.dataset)) if i < len(index)]
+		self.signal_table = signal_engine.score_candles(index, self.dataset.close, self.price_sd_series, self.volume_sd_series, pImbalanceRatios, order)
+		return signal_engine.get_signals(self.signal_table, self.sigma_sort_low)
 
 	def get_static_body_id(self):
 		return ep_body_create_static(self.world)
@@ -752,98 +905,176 @@ class ControlVolumeTank():
 	def game_end(self):	
 		ep_world_destroy(self.world)
 
+	def handle_events(self):
+		for event in pygame.event.get():
+			if event.type == "QUIT":
+				pygame.quit()
+				sys.exit()
+			elif event.type == "MOUSEMOTION":
+				self.mouse_x, self.mouse_y = event.pos
+			elif event.type == "MOUSEBUTTONDOWN":
+				self.mouse_x, self.mouse_y = event.pos
+				if ep_world_collision_test_circle(self.world, 0, self.mouse_x, self.mouse_y, 0, 1, 1, 0) > 0:
+					b = ep_world_get_collision_body(self.world, 0)
+					s = ep_world_get_collision_shape(self.world, 0)
+					if not ep_body_is_static(self.world, b):
+						xx = ep_body_coord_world_to_local_x(self.world, b, self.mouse_x, self.mouse_y)
+						yy = ep_body_coord_world_to_local_y(self.world, b, self.mouse_x, self.mouse_y)
+						mousehingejoint = ep_hingejoint_create(self.world, b, self.mouseParticleId, xx, yy, 0, 0, 0)
+						ep_hingejoint_set_max_force(self.world, mousehingejoint, 10000)
+			elif event.type == "MOUSEBUTTONUP":
+				self.mouse_x, self.mouse_y = event.pos
+				if self.MOUSE_HINGE_JOINT != -1.0:
+					ep_hingejoint_destroy(self.world, self.MOUSE_HINGE_JOINT)
+					self.MOUSE_HINGE_JOINT = -1.0
+			elif event.type == "KEYDOWN":
+				if event.key == "K_ESCAPE":
+					pygame.event.post(pygame.event.Event(QUIT))
+				elif event.key == "K_r":
+					self.game_end()
+					self.game_start()
+
 	def game_run(self):
 		self.game_start()
+		self.simulate()
+		if self.keep_world == False:
+			self.game_end()
 
-		while self.run == True:	
-			for event in pygame.event.get():
-				if event.type == "QUIT":
-					pygame.quit()
-					sys.exit()
-				elif event.type == "MOUSEMOTION":
-					self.mouse_x, self.mouse_y = event.pos
-				elif event.type == "MOUSEBUTTONDOWN":
-					self.mouse_x, self.mouse_y = event.pos
-					if ep_world_collision_test_circle(self.world, 0, self.mouse_x, self.mouse_y, 0, 1, 1, 0) > 0:
-						b = ep_world_get_collision_body(self.world, 0)
-						s = ep_world_get_collision_shape(self.world, 0)
-						if not ep_body_is_static(self.world, b):
-							xx = ep_body_coord_world_to_local_x(self.world, b, self.mouse_x, self.mouse_y)
-							yy = ep_body_coord_world_to_local_y(self.world, b, self.mouse_x, self.mouse_y)
-							mousehingejoint = ep_hingejoint_create(self.world, b, self.mouseParticleId, xx, yy, 0, 0, 0)
-							ep_hingejoint_set_max_force(self.world, mousehingejoint, 10000)
-				elif event.type == "MOUSEBUTTONUP":
-					self.mouse_x, self.mouse_y = event.pos
-					if self.MOUSE_HINGE_JOINT != -1.0:
-						ep_hingejoint_destroy(self.world, self.MOUSE_HINGE_JOINT)
-						self.MOUSE_HINGE_JOINT = -1.0
-				elif event.type == "KEYDOWN":
-					if event.key == "K_ESCAPE":
-						pygame.event.post(pygame.event.Event(QUIT))
-					elif event.key == "K_r":
-						self.game_end()
-						self.game_start()
-			
-			vx = self.mouse_x - ep_body_get_x_center(self.world, self.mouseParticleId)
-			vy = self.mouse_y - ep_body_get_y_center(self.world, self.mouseParticleId)
-			if self.MOUSE_HINGE_JOINT != -1.0:
-				d = math.sqrt(vx * vx + vy * vy)
-				if d > 10:
-					vx *= 10 / d
-					vy *= 10 / d
-			ep_body_set_velocity_center(self.world, self.mouseParticleId, vx, vy, 0)
-			
-			for i in range(4):
-				ep_world_update_contacts(self.world)
-				ep_world_simulate_step(self.world)
-			
-			self.surf_window.lock()
-			self.surf_window.fill(pygame.Color(0, 0, 0))
-			
-			for b in self.edge_boxes:
-				self.draw_box(b[2], b[3], b[0], b[1], b[4], self.color_static)
-			
-			for b in self.heavy_particles:
-				self.draw_box(ep_body_get_x(self.world, b), \
-					ep_body_get_y(self.world, b), self.PARTICLE_DIAMETER, self.PARTICLE_DIAMETER, ep_body_get_rot(self.world, b), \
-					self.COLOR_HEAVY_PARTICLES)
-			
-			for b in self.light_particles:
-				self.draw_box(ep_body_get_x(self.world, b), \
-					ep_body_get_y(self.world, b), self.PARTICLE_DIAMETER, self.PARTICLE_DIAMETER, ep_body_get_rot(self.world, b), \
-					self.COLOR_LIGHT_PARTICLES)
-			
-			for b in self.candlestick_boxes:
-				self.draw_box(b[2], b[3], b[0], b[1], b[4], self.color_static)
-						
-			for b in self.standard_dev_list:
-				self.draw_standard_dev_line(b)
-
-			for b in self.standard_dev_list_vol:
-				self.draw_standard_dev_line_vol(b)
-
-			for b in self.mfi:
-				if self.show_MFI == True:
-					tmpIndex = self.mfi.index(b)
-					self.draw_mfi(b, tmpIndex)
+	def resume(self, pData):
+		# live mode: roll the kept world to the new bars and let it re-settle around them, returns the candles shifted
+		shift = self.roll_window(pData)
+		self.index_counter = 0
+		self.run = True
+		self.FRAME_LIMIT = self.live_settle_frame_limit
+		if self.engine == "deposition":
+			self.deposit_particles()
+		if self.convergence_mode is not None:
+			self.convergence = convergence.ConvergenceMonitor(self.convergence_mode, self.convergence_threshold)
+		self.simulate()
+		return shift
+
+	def continues(self, pData):
+		# True when pData holds every bar of the current window in a row, a newer snapshot of the series that only adds bars
+		timestamps = self.dataset.timestamps
+		if len(timestamps) == 0:
+			return False
+		start = int(np.searchsorted(pData.timestamps, timestamps[0]))
+		return np.array_equal(pData.timestamps[start:start + len(timestamps)], timestamps)
+
+	def roll_window(self, pData):
+		# the oldest candles drop off, the kept ones and the particles on them move left, only the new candles are built
+		oldTimestamps = self.dataset.timestamps
+		oldBoxes = self.candle_boxes
+		oldBodies = self.candle_bodies
+
+		self.ohlcv = pData
+		self.dataset = self.ohlcv.tail(315, self.offset_index)
+		candleBoxIds = set(id(b) for b in oldBoxes)
+		self.edge_boxes = [b for b in self.edge_boxes if id(b) not in candleBoxIds]
+		self.candle_boxes = []
+		self.new_x = self.new_x_default_value
+		self.candleIndex = 0
+		self.reset_indicator_lines()
+		self.prepare_window()
+
+		shift, keptCount = self.reuse_candles(oldTimestamps, oldBoxes, oldBodies)
+		self.print_verbose( "Rolled " + str(shift) + " candles, " + str(len(self.candle_boxes) - keptCount) + " candle bodies rebuilt" )
+		return shift
+
+	def reuse_candles(self, pOldTimestamps, pOldBoxes, pOldBodies):
+		# moves the bodies of the old candles that are still in the window left, builds the others, returns (shift, candles kept)
+		shift = int(np.searchsorted(pOldTimestamps, self.dataset.timestamps[0])) if len(self.dataset) > 0 else len(pOldBoxes)
+		dx = shift * self.candlePlusGutterWidth
+		kept = set()
+		firstChangedX = None
+		self.candle_bodies = []
+		for i, box in enumerate(self.candle_boxes):
+			j = i + shift
+			if j < len(pOldBoxes) and pOldTimestamps[j] == self.dataset.timestamps[i] and \
+				world_checkpoint.get_geometry([pOldBoxes[j][:2] + [pOldBoxes[j][2] - dx, pOldBoxes[j][3]]]) == world_checkpoint.get_geometry([box]):
+				if dx != 0 and self.merge_candle_bodies == False:
+					ep_body_set_position(self.world, pOldBodies[j], ep_body_get_x(self.world, pOldBodies[j]) - dx, 0, 0)
+				self.candle_bodies.append(pOldBodies[j])
+				kept.add(j)
+			else:
+				self.candle_bodies.append(None)
+				if firstChangedX is None:
+					firstChangedX = box[2]
+
+		if self.merge_candle_bodies == True:
+			# the shared body is rebuilt as a whole, it's one body no matter how many candles changed
+			self.destroy_candle_bodies(pOldBodies)
+			self.candle_bodies = self.create_candle_bodies(self.candle_boxes)
+		else:
+			self.destroy_candle_bodies([pOldBodies[j] for j in range(0, len(pOldBodies)) if j not in kept])
+			changed = [i for i in range(0, len(self.candle_bodies)) if self.candle_bodies[i] is None]
+			for i, body in zip(changed, self.create_candle_bodies([self.candle_boxes[i] for i in changed])):
+				self.candle_bodies[i] = body
+
+		self.shift_particles(dx, firstChangedX)
+		return shift, len(kept)
+
+	def shift_particles(self, pDx, pFirstChangedX):
+		# particles follow their candles, the ones pushed past the left wall are born again at the right
+		left = self.CONTAINER_WALLS_WIDTH * 2
+		right = self.WINDOW_WIDTH - self.CONTAINER_WALLS_WIDTH * 2
+		wakeFrom = right if pFirstChangedX is None else pFirstChangedX - self.candlePlusGutterWidth * 2
+		for particles, birthY in ((self.heavy_particles, 10), (self.light_particles, self.WINDOW_HEIGHT - 10)):
+			for b in particles:
+				x = ep_body_get_x(self.world, b) - pDx
+				y = ep_body_get_y(self.world, b)
+				reborn = x < left
+				if reborn == True:
+					x += right - left
+					y = birthY
+					ep_body_set_velocity_center(self.world, b, 0, 0, 0)
+				if pDx != 0:
+					ep_body_set_position(self.world, b, x, y, ep_body_get_rot(self.world, b))
+				if reborn == True or x >= wakeFrom:
+					ep_body_set_sleeping(self.world, b, False, False)
+
+	def deposit_particles(self):
+		# --engine deposition: every particle goes straight to where it would settle, one frame is all that's left to draw
+		(heavyX, heavyY), (lightX, lightY) = deposition.deposit(self.candle_boxes, self.particle_birth_columns, self.particle_birth_columns, \
+			self.WINDOW_WIDTH, self.WINDOW_HEIGHT, self.CONTAINER_WALLS_WIDTH, self.PARTICLE_DIAMETER)
+		for particles, x, y in ((self.heavy_particles, heavyX, heavyY), (self.light_particles, lightX, lightY)):
+			for i, b in enumerate(particles):
+				ep_body_set_position(self.world, b, float(x[i]), float(y[i]), 0)
+		self.FRAME_LIMIT = 1
+
+	def step_frame(self):
+		if self.engine != "physics":
+			return # the deposition engine has no dynamics, the particles stay where it put them
+		vx = self.mouse_x - ep_body_get_x_center(self.world, self.mouseParticleId)
+		vy = self.mouse_y - ep_body_get_y_center(self.world, self.mouseParticleId)
+		if self.MOUSE_HINGE_JOINT != -1.0:
+			d = math.sqrt(vx * vx + vy * vy)
+			if d > 10:
+				vx *= 10 / d
+				vy *= 10 / d
+		ep_body_set_velocity_center(self.world, self.mouseParticleId, vx, vy, 0)
+		
+		for i in range(4):
+			ep_world_update_contacts(self.world)
+			ep_world_simulate_step(self.world)
 
-			for b in self.mfi_standard_dev:	
-				if self.show_MFI == True:
-					self.draw_sd_mfi(b)
+	def simulate(self):
+		while self.run == True:	
+			if self.headless == False:
+				self.handle_events()
 
-			pygame.display.set_caption(self.truncated_dataset_file_name + "    |||    " + str( self.offset_index  ) + " steps back " )
+			self.step_frame()
 
-			self.surf_window.unlock()
+			if self.index_counter + 1 < self.FRAME_LIMIT and self.has_converged() == True:
+				self.FRAME_LIMIT = self.index_counter + 1 # this frame becomes the final one
 			
-			self.display_text_large(self.truncated_dataset_file_name, 10, 695, pygame.Color(255, 255, 255))
-						
-			# chart labels
-			# text = "----" + str(self.DATASET_HIGHEST)
-			# self.displayText(text, self.interpolate(self.DATASET_HIGHEST + 2), self.get_x_location_of_candle(self.DATASET_HIGHEST_INDEX),\
-			# 	pygame.Color(255, 255, 0))
+			# headless runs only draw the frames that get saved
+			if self.headless == False or self.save_sequences == True or self.index_counter + 1 == self.FRAME_LIMIT:
+				self.draw_frame()
 
-			pygame.display.update()
-			self.fpsclock.tick(self.FRAME_RATE)
+			if self.headless == False:
+				pygame.display.update()
+				self.fpsclock.tick(self.FRAME_RATE)
 
 			self.index_counter += 1
 
@@ -860,25 +1091,80 @@ class ControlVolumeTank():
 			# make the histogram
 			if self.index_counter == self.FRAME_LIMIT:
 				
-				tmpFileName = self.render_histogram_directory + self.truncated_dataset_file_name + ".png"
-					
 				# make the histogram folder if it's absent
 				if not os.path.exists(self.render_histogram_directory):
 					os.makedirs(self.render_histogram_directory)
 
-				self.print_verbose( "Preparing final frame output to " + tmpFileName ) 
-				pygame.image.save(self.surf_window, tmpFileName)
+				self.make_video_from_sequence()
 
-				self.make_histogram( tmpFileName )
+				# a sigma sweep renders every period from this one final frame of the physics
+				for period in self.sigma_sweep_periods or [self.sigma_period]:
+					if period != self.sigma_period:
+						self.select_sigma_period(period)
+						self.draw_frame()
 
-				# Delete the temp file
-				os.system( "rm " + tmpFileName )
+					self.print_verbose( "Preparing final frame output" ) 
+					self.make_histogram( self.get_frame_image() )
 
-				self.make_video_from_sequence()
+				if len(self.sigma_sweep_periods) > 0:
+					self.save_sigma_sweep()
+
+				self.save_world_checkpoint()
 
 				self.run = False
 
-		self.game_end()
+	def draw_frame(self):
+		self.surf_window.lock()
+		self.surf_window.fill(pygame.Color(0, 0, 0))
+		
+		for b in self.edge_boxes:
+			self.draw_box(b[2], b[3], b[0], b[1], b[4], self.color_static)
+		
+		if self.draw_particles == True:
+			for b in self.heavy_particles:
+				self.draw_box(ep_body_get_x(self.world, b), \
+					ep_body_get_y(self.world, b), self.PARTICLE_DIAMETER, self.PARTICLE_DIAMETER, ep_body_get_rot(self.world, b), \
+					self.COLOR_HEAVY_PARTICLES)
+
+			for b in self.light_particles:
+				self.draw_box(ep_body_get_x(self.world, b), \
+					ep_body_get_y(self.world, b), self.PARTICLE_DIAMETER, self.PARTICLE_DIAMETER, ep_body_get_rot(self.world, b), \
+					self.COLOR_LIGHT_PARTICLES)
+		
+		for b in self.candlestick_boxes:
+			self.draw_box(b[2], b[3], b[0], b[1], b[4], self.color_static)
+					
+		for b in self.standard_dev_list:
+			self.draw_standard_dev_line(b)
+
+		for b in self.standard_dev_list_vol:
+			self.draw_standard_dev_line_vol(b)
+
+		for b in self.mfi:
+			if self.show_MFI == True:
+				tmpIndex = self.mfi.index(b)
+				self.draw_mfi(b, tmpIndex)
+
+		for b in self.mfi_standard_dev:	
+			if self.show_MFI == True:
+				self.draw_sd_mfi(b)
+
+		if self.headless == False:
+			pygame.display.set_caption(self.truncated_dataset_file_name + "    |||    " + str( self.offset_index  ) + " steps back " )
+
+		self.surf_window.unlock()
+		
+		self.display_text_large(self.truncated_dataset_file_name, 10, 695, pygame.Color(255, 255, 255))
+					
+		# chart labels
+		# text = "----" + str(self.DATASET_HIGHEST)
+		# self.displayText(text, self.interpolate(self.DATASET_HIGHEST + 2), self.get_x_location_of_candle(self.DATASET_HIGHEST_INDEX),\
+		# 	pygame.Color(255, 255, 0))
+
+	def save_sigma_sweep(self):
+		tmpFileName = self.render_histogram_directory + self.truncated_dataset_file_name + "_" + self.number_formatter(self.offset_index) + "_sweep.npz"
+		indicator_memo.save_sigma_sweep(tmpFileName, self.sigma_sweep, self.sigma_sweep_periods, self.dataset.timestamps)
+		self.print_verbose( "Sigma sweep matrices saved to " + tmpFileName )
 
 	def make_video_from_sequence(self):
 		tmpDir = self.render_frames_directory + self.truncated_dataset_file_name + "/"
@@ -926,33 +1212,67 @@ class ControlVolumeTank():
 	def get_phi(self):
 		return ((1+5 ** 0.5) / 2)
 
-	def make_histogram(self, pImg):
-		img = Image.open(pImg)
-		img_bbox = img.getbbox()
-		self.draw = ImageDraw.Draw(img)
-		pixels = img.load()
-		imbalanceRatioArray = []
-		offsetY = 80
-
-		for xx in range( img.size[0] ):
+	def get_particle_positions(self, pParticles):
+		return np.array([ep_body_get_x(self.world, b) for b in pParticles]), np.array([ep_body_get_y(self.world, b) for b in pParticles])
 
-			heavyParticleCounter = 0.0
-			lightParticleCounter = 0.0
-			tmpOffset = 12
+	def get_accumulation_bands(self):
+		# heavy then light histogram counts per candle width band, what make_histogram sees, for comparing how two runs settled
+		heavyX, heavyY = self.get_particle_positions(self.heavy_particles)
+		lightX, lightY = self.get_particle_positions(self.light_particles)
+		bands = np.arange(self.WINDOW_WIDTH) // self.candlePlusGutterWidth
+		return np.concatenate([np.bincount(bands, weights=particle_histogram.get_column_counts(x, y, self.WINDOW_WIDTH, self.WINDOW_HEIGHT, self.PARTICLE_DIAMETER)) \
+			for x, y in ((heavyX, heavyY), (lightX, lightY))])
 
-			for yy in range(tmpOffset, img.size[1] - tmpOffset): # filter out particle detritus from the histogram data
+	def run_physics(self):
+		# the frames of simulate() without drawing or output, FRAME_LIMIT and --converge still end it
+		self.index_counter = 0
+		while self.index_counter < self.FRAME_LIMIT:
+			self.step_frame()
+			if self.index_counter + 1 < self.FRAME_LIMIT and self.has_converged() == True:
+				self.FRAME_LIMIT = self.index_counter + 1
+			self.index_counter += 1
 
-				if pixels[ xx, yy ] == (0, 146, 255):
-					heavyParticleCounter += 1.0
-				elif pixels[ xx, yy ] == (255, 0, 255):
-					lightParticleCounter += 1.0
+	def benchmark_physics(self):
+		# world setup and the physics only, no drawing or output, returns (setup seconds, physics seconds)
+		start = time.time()
+		self.game_start()
+		setupTime = time.time() - start
+		start = time.time()
+		self.run_physics()
+		return setupTime, time.time() - start
+
+	def get_imbalance_ratios(self):
+		# the (columns x 2) imbalance array of the particles' current positions, see lib/particle_histogram.py
+		heavyX, heavyY = self.get_particle_positions(self.heavy_particles)
+		lightX, lightY = self.get_particle_positions(self.light_particles)
+		return particle_histogram.get_imbalance_ratios(
+			particle_histogram.get_column_counts(heavyX, heavyY, self.WINDOW_WIDTH, self.WINDOW_HEIGHT, self.PARTICLE_DIAMETER),
+			particle_histogram.get_column_counts(lightX, lightY, self.WINDOW_WIDTH, self.WINDOW_HEIGHT, self.PARTICLE_DIAMETER))
+
+	def get_frame_image(self):
+		# the final frame as a PIL image straight from the surface, no PNG round trip
+		return Image.frombytes("RGB", self.surf_window.get_size(), pygame.image.tostring(self.surf_window, "RGB"))
+
+	def make_histogram(self, pImg, pImbalanceRatios=None, pBands=None):
+		# pImbalanceRatios replaces the particles' own array, an ensemble passes its mean and its quantile bands in pBands
+		img = pImg
+		self.draw = ImageDraw.Draw(img)
+		offsetY = 80
 
-			imbalanceRatio1 = (heavyParticleCounter+1.0)/(lightParticleCounter+1.0)
-			imbalanceRatio2 = (lightParticleCounter+1.0)/(heavyParticleCounter+1.0)
-			imbalanceRatioArray.append( [-imbalanceRatio1, imbalanceRatio2] )
+		# heavy/light particles per pixel column from the body coordinates, lines and text drawn over them don't matter
+		imbalanceRatioArray = self.get_imbalance_ratios() if pImbalanceRatios is None else pImbalanceRatios
 
 		tmpParticleFlowIndex = [] # experimental
 
+		# the ensemble's quantile bands, dimmed under the mean
+		if self.show_histogram_ratio == True:
+			for band in pBands or []:
+				for r in range(0, len(band)):
+					self.draw.line(( r-1, 100+band[r-1][0]*self.special_number(), r, 100+band[r][0]*self.special_number()), \
+						fill=(self.COLOR_HISTOGRAM_BAND_UP), width=1 )
+					self.draw.line(( r-1, 100+band[r-1][1]*self.special_number(), r, 100+band[r][1]*self.special_number()), \
+						fill=(self.COLOR_HISTOGRAM_BAND_DOWN), width=1 )
+
 		# Draw histogram at the top of the chart
 		if self.show_histogram_ratio == True:
 			for r in range(0, len(imbalanceRatioArray)):
@@ -977,68 +1297,40 @@ class ControlVolumeTank():
 		# note: we are doing the averaging even if we don't show it, 
 		# this is because we need the average to perform other work later on
 
-		tmpAvg1 = []		
-		for r in range(0, len(imbalanceRatioArray)): 
-			tmpAvg = 0
-			tmpthing = 0 
-			for f in range(0, self.histogram_simple_average_period):
-				tmpthing += imbalanceRatioArray[r-f][0]
-			tmpAvg = tmpthing/self.histogram_simple_average_period
-			tmpAvg1.append(tmpAvg)
+		# rolling windows over the whole array at once, r-f wraps around to the end like the negative list indexes did
+		imbalanceRatios = np.array(imbalanceRatioArray, dtype=np.float64)
+		averageWindows = sdef.getWindowIndexes(len(imbalanceRatios), self.histogram_simple_average_period)
+
+		tmpAvg1 = sdef.getSequentialSum(imbalanceRatios[averageWindows, 0]) / self.histogram_simple_average_period
 
 		if self.show_histogram_simple_average == True:
 			for r in range(0, len( tmpAvg1 ) ):
 				self.draw.line(( r-1, offsetY+tmpAvg1[r-1]*self.special_number(), r, offsetY+tmpAvg1[r]*self.special_number()), fill=(self.COLOR_HISTOGRAM_UP), width=1 )
 		
 		# Draw a simple average of the ratio - this section draws for the pink side
-		tmpAvg1 = []
-		for r in range(0, len(imbalanceRatioArray)): 
-			tmpAvg = 0
-			tmpthing = 0 
-			for f in range(0, self.histogram_simple_average_period):
-				tmpthing += imbalanceRatioArray[r-f][1]
-			tmpAvg = tmpthing/self.histogram_simple_average_period
-			tmpAvg1.append(tmpAvg)
+		tmpAvg1 = sdef.getSequentialSum(imbalanceRatios[averageWindows, 1]) / self.histogram_simple_average_period
 
 		if self.show_histogram_simple_average == True:
 			for r in range(0, len( tmpAvg1 ) ):
 				self.draw.line(( r-1, offsetY+tmpAvg1[r-1]*self.special_number(), r, offsetY+tmpAvg1[r]*self.special_number()), fill=(self.COLOR_HISTOGRAM_DOWN), width=1 )
 
+		# score every candle against the histogram once, the entry lines below and the saved table read the result
+		self.signals = self.get_signals(imbalanceRatios)
+
 		if self.highlight_sigma == True:
 
 			# DRAW VERTICAL LINE AT POINT OF LOWEST STANDARD DEV
-			# find the low points in the standard dev
-			# put all the Y values of the standard deviation in a separate list
-			# an entry in the list looks like [[0, 900], [10, 639.1957450511611]]
-			# we want to look a the second nested list, and only the Y component
-			# the higher this number is, the lower it occurs on the chart, i.e. the lowest standard dev value
-			tmpList = []
-			for index in range(0, len(self.standard_dev_list)):
-				tmpList.append( self.standard_dev_list[index][1][1] )
-
-			# this works fine for the lowest, but only one result 
-			# tmpX = self.standard_dev_list[tmpList.index( max(tmpList) )][1][0]
-			# tmpY = max(tmpList) # returns what represents the lowest standard dev value
-			# # print(tmpX, tmpY)
-			# self.draw.line(( tmpX, 0, tmpX, tmpY ), fill=(self.COLOR_ENTRY_SIGNAL), width=1 )
-
-			# ----- TEST AREA -----------------------------------------------------------------------	
+			# the signals are the sigma_sort_low candles with the lowest price SD, i.e. the lowest points of the SD line,
+			# green when buyers outweigh sellers in the histogram under the candle, red the other way round
 			# TODO: determine if we can be smarter about how many lines to show per sigma low
 
-			largest = heapq.nlargest(self.sigma_sort_low, enumerate(tmpList), key=lambda x: x[1])
-
-			for item in largest:
-				# self.print_debug( item )
-
-				tmpX = self.standard_dev_list[item[0]][1][0]
-				tmpY = item[1]
-
-				buyers = abs( imbalanceRatioArray[ self.get_x_location_of_candle( item[0] ) ][0] )
-				sellers = abs( imbalanceRatioArray[ self.get_x_location_of_candle( item[0] ) ][1] )
-				tmpYIndicatorStart = self.standard_dev_list_vol[  item[0]  ][0][1]
-				if ( buyers > sellers):
+			for signal in self.signals:
+				tmpX = self.standard_dev_list[signal["candle"]][1][0]
+				tmpY = self.standard_dev_list[signal["candle"]][1][1]
+				tmpYIndicatorStart = self.standard_dev_list_vol[ signal["candle"] ][0][1]
+				if signal["direction"] > 0:
 					self.draw.line(( tmpX, tmpYIndicatorStart, tmpX, tmpY ), fill=(self.COLOR_ENTRY_SIGNAL), width=1 )
-				elif ( sellers > buyers):
+				else:
 					self.draw.line(( tmpX, tmpYIndicatorStart, tmpX, tmpY ), fill=( (255,0,0) ), width=1 )	
 
 				# orig
@@ -1063,40 +1355,26 @@ class ControlVolumeTank():
 		if self.show_histogram_standard_dev == True:
 			# Draw a standard deviation line based on the particle counts
 			# histogram up - blue
-			sdevParticles = []
 			sigmaLookbackParticleCount = self.histogram_standard_dev_period
 			sdevParticlesAdjust = 2
 			offsetY = 125
 
-			for r in range(0, len(imbalanceRatioArray)): 
-				topParticlesSet = []
-				for f in range(0, sigmaLookbackParticleCount):
-					topParticlesSet.append( imbalanceRatioArray[r-f][0] )			
-				standardDev = sdef.getStandardDeviation(topParticlesSet).real
-				standardDev *= (math.pow(  math.pi*self.get_phi(), sdevParticlesAdjust) )
-				standardDev *= -1  # negative adjustment to flip the projection
-				sdevParticles.append( standardDev )	
+			# same windows (r, r-1, ...) and formula as getStandardDeviation, negative adjustment to flip the projection
+			sdevParticles = sdef.getRollingStandardDeviation(imbalanceRatios[:, 0], sigmaLookbackParticleCount)
+			sdevParticles = -(sdevParticles * math.pow(  math.pi*self.get_phi(), sdevParticlesAdjust))
 
 			for r in range(0, len( sdevParticles ) ):
 				self.draw.line(( r-1, offsetY+sdevParticles[r-1]*self.special_number(), r, offsetY+sdevParticles[r]*self.special_number()), fill=(self.COLOR_HISTOGRAM_UP), width=1 )
 
 			# histogram down - pink
-			sdevParticles = []
-			for r in range(0, len(imbalanceRatioArray)): 
-				bottomParticlesSet = []
-				for f in range(0, sigmaLookbackParticleCount):
-					bottomParticlesSet.append( imbalanceRatioArray[r-f][1] )			
-				standardDev = sdef.getStandardDeviation(bottomParticlesSet).real
-				standardDev *= (math.pow(  math.pi*self.get_phi(), sdevParticlesAdjust) )
-				standardDev *= -1  # negative adjustment to flip the projection
-				sdevParticles.append( standardDev )
+			sdevParticles = sdef.getRollingStandardDeviation(imbalanceRatios[:, 1], sigmaLookbackParticleCount)
+			sdevParticles = -(sdevParticles * math.pow(  math.pi*self.get_phi(), sdevParticlesAdjust))
 
 			for r in range(0, len( sdevParticles ) ):
 				self.draw.line(( r-1, offsetY+sdevParticles[r-1]*self.special_number(), r, offsetY+sdevParticles[r]*self.special_number()), fill=(self.COLOR_HISTOGRAM_DOWN), width=1 )
 
 		# Build the histogram directory if it's not there
-		gif_animation_directory = self.render_histogram_directory + self.histogram_animation_directory + \
-								  self.truncated_dataset_file_name + "_" + self.number_formatter(self.offset_index) + "_sig" + str( self.sigma_period )
+		gif_animation_directory = self.get_histogram_directory()
 		if not os.path.exists( gif_animation_directory ):
 			os.makedirs( gif_animation_directory )
 
@@ -1107,13 +1385,10 @@ class ControlVolumeTank():
 		print(TextColors.HEADERLEFT3 + " ░" + TextColors.ENDC + TextColors.HEADERLEFT + " ░" + TextColors.ENDC + TextColors.HEADERLEFT2 + " ░" + TextColors.ENDC)
 
 		# Save the histogram
-		img.save(gif_animation_directory + "/" + \
-				 self.truncated_dataset_file_name + "_" + \
-				 # local_current_time + "_" + \
-				 self.number_formatter(self.offset_index) + "_" + \
-				 self.number_formatter(self.permutation_index) + \
-				 "_sig" + str( self.sigma_period ) + \
-				 ".png", format='PNG')
+		img.save(self.get_histogram_file_name() + ".png", format='PNG')
+
+		# the same signals as a typed table, np.load() it instead of parsing the image
+		signal_engine.save_signals(self.get_histogram_file_name() + "_signals.npy", self.signals)
 
 		# make a gif from available images
 		arg = "ffmpeg -pattern_type glob -i '" + gif_animation_directory + "/*.png' -y " + gif_animation_directory + "/temp.avi"
@@ -1128,6 +1403,17 @@ class ControlVolumeTank():
 		# Automatically display the image
 		# img.show()
 
+	def get_histogram_directory(self):
+		return self.render_histogram_directory + self.histogram_animation_directory + \
+			self.truncated_dataset_file_name + "_" + self.number_formatter(self.offset_index) + "_sig" + str( self.sigma_period )
+
+	def get_histogram_file_name(self):
+		# without the extension, an ensemble's histogram is named after its size instead of a permutation
+		run = "ens" + str(self.ensemble_size) if self.ensemble_size > 0 else self.number_formatter(self.permutation_index)
+		# local_current_time could go in here too
+		return self.get_histogram_directory() + "/" + self.truncated_dataset_file_name + "_" + \
+			self.number_formatter(self.offset_index) + "_" + run + "_sig" + str( self.sigma_period )
+
 	def set_permutation_name(self, pIterationNumber):
 		self.permutation_name = \
 		str(pIterationNumber) + "_" + \
@@ -1161,41 +1447,234 @@ class ControlVolumeTank():
 # This particular flavor uses CSV files containing OHLC data. These files can be static or
 # dynamically updated, provided they adhere to the structure as included in sample CSV.
 # Place or write all CSV files in the directory specified in app.yaml.
-app_yaml = open("../config/app.yaml", "r").readlines()
-path_to_csv_files = app_yaml[0].split(":")[1] # TODO: make this a little smarter
-arbitraryRunLimit = 99 # The number of times to run the simulation
-
-for r in range(0, arbitraryRunLimit): 
 
-	dataset_list = []
-	if r == 0: # only strip this the first time
-		path_to_csv_files = path_to_csv_files.strip() + "/*.csv"
-	files = glob.glob(path_to_csv_files) # Get all the CSV files
-	files.sort(key=os.path.getmtime) # Sort the files based on latest
-	
-	for csvfile in reversed(files):
-		dataset_list.append(csvfile) # Add the files to a list
-
-	for dataset in dataset_list[:1]: # Loop up to [:N] datasets e.g. [:3]		
-		lookback = 0 # Default is 1. To loop iterations within a dataset use following loop with lookback. e.g., setting this to 60 will use one dataset to create 60 simulations, each one starting a candle earlier. Useful for looking for patterns on old data. Set lookback to 1 when running in a production/trading mode, assuming your CSV file is being updated in real time.	
-		i = 0
-		while i <= lookback:
-
-			cvt = ControlVolumeTank() # The ControlVolumeTank is the class running the simulation.
-			lookback = int(cvt.sample_period_size) # override if this was passed in
-			cvt.permutation_index = r
-
-			if lookback > 0:
-				cvt.offset_index = i  # Sets an index based on where we are at in the lookback sequence. If lookback is 1 then we aren't running multiple simulations off the same dataset, but fresh ones every time.
-			if cvt.offset_index_override != 0:
-				cvt.offset_index = cvt.offset_index_override - i
-				print("Beginning at candle " + str( cvt.offset_index ))
-			cvt.dataset_file = dataset
-			print( "Current OHLC dataset: " + TextColors.HEADERLEFT2 + TextColors.INVERTED + dataset + TextColors.ENDC)
-			random.seed()
-			cvt.set_particles_diameter( 2 )
-			cvt.set_candlestick_width( 3 )
-			cvt.set_particles_birth_count( particle_birth_count )
-			cvt.set_candle_gutter( 1 )
-			cvt.game_run()
-			i += 1
+def create_benchmark_tank(pDataset, pSeed, pOffset=0, pArgs=None):
+	# a headless tank set up like the runner's, for the benchmark and calibration runs
+	cvt = ControlVolumeTank(True, pArgs)
+	cvt.dataset_file = pDataset
+	cvt.physics_seed = pSeed
+	cvt.offset_index = pOffset
+	cvt.set_particles_diameter( 2 )
+	cvt.set_candlestick_width( 3 )
+	cvt.set_particles_birth_count( particle_birth_count )
+	cvt.set_candle_gutter( 1 )
+	return cvt
+
+def run_ensemble_member(pMember):
+	# one ensemble member in a pool worker, returns its seed and its (columns x 2) imbalance array,
+	# the worker's settings come with the member, a worker never parses the command line itself
+	dataset, seed, offset, args = pMember
+	cvt = create_benchmark_tank(dataset, seed, offset, args)
+	cvt.game_start()
+	cvt.run_physics()
+	imbalanceRatios = cvt.get_imbalance_ratios()
+	cvt.game_end()
+	return seed, imbalanceRatios
+
+# Live indicator state per series, checkpointed to ../cache/indicators/ so a restart or the next snapshot file only folds in the bars it missed.
+live_indicators = {}
+def update_live_indicators(pDataset, pData, pSigmaPeriod, pCompatible, pChartHeight):
+	seriesName = csv_catalog.get_series_name(pDataset)
+	checkpointFile = streaming_indicators.get_checkpoint_file_name(seriesName)
+	indicators = live_indicators.get(seriesName)
+	if indicators is None and os.path.exists(checkpointFile):
+		try:
+			indicators = streaming_indicators.load(checkpointFile)
+		except Exception:
+			indicators = None # unreadable checkpoint, start over
+	if indicators is None or not indicators.matches(pSigmaPeriod, 315, pCompatible) or indicators.mfi_chart_height != pChartHeight:
+		indicators = streaming_indicators.StreamingIndicators(pSigmaPeriod, 315, pCompatible, pChartHeight)
+
+	if indicators.update_from(pData) > 0:
+		indicators.save(checkpointFile)
+	live_indicators[seriesName] = indicators
+	return indicators
+
+# The runner only runs when the script is started, the ensemble's spawned workers import this module for the class alone.
+if __name__ == "__main__":
+	app_yaml = open("../config/app.yaml", "r").readlines()
+	path_to_csv_files = app_yaml[0].split(":")[1] # TODO: make this a little smarter
+	path_to_csv_files = path_to_csv_files.strip() + "/*.csv"
+	arbitraryRunLimit = 99 # The number of times to run the simulation
+
+	# The catalog indexes the CSV directory and answers "newest snapshot", only new or rewritten files are read again.
+	# In live mode the newest CSV is watched and only the bars appended to it are parsed.
+	runner_args = get_argument_parser().parse_args()
+	catalog = csv_catalog.CSVCatalog(os.path.dirname(path_to_csv_files), os.path.basename(path_to_csv_files))
+
+	if runner_args.ingest_archive:
+		catalog.refresh()
+		archive = ohlcv_archive.OHLCVArchive()
+		for snapshotFile, seriesName in catalog.snapshots():
+			newBars = archive.ingest(seriesName, csv_schema.load_ohlcv(snapshotFile))
+			print(str(newBars) + " new bars from " + snapshotFile)
+		sys.exit()
+
+	if runner_args.benchmark_merge:
+		# the newest window with one body per candle, with merged candles, and with one body per candle and the next seed,
+		# the last run is the noise floor: merged candles are fine when they move no more particles than a new seed does
+		catalog.refresh()
+		dataset = catalog.newest_snapshots()[0]
+		seed = int(runner_args.seed) if runner_args.seed else 1
+		bands = []
+		for label, merged, runSeed in (("one body per candle", False, seed), ("merged candles", True, seed), ("one body per candle, next seed", False, seed + 1)):
+			cvt = create_benchmark_tank(dataset, runSeed)
+			cvt.merge_candle_bodies = merged
+			setupTime, physicsTime = cvt.benchmark_physics()
+			bands.append(cvt.get_accumulation_bands())
+			print(label + ": " + str(len(set(cvt.candle_bodies))) + " candle bodies, setup " + str(round(setupTime, 3)) + "s, " + \
+				str(cvt.FRAME_LIMIT) + " frames " + str(round(physicsTime, 3)) + "s")
+			cvt.game_end()
+
+		change = convergence.get_histogram_change(bands[0], bands[1])
+		noise = convergence.get_histogram_change(bands[0], bands[2])
+		print("Particles in another candle band, merged: " + str(round(change * 100, 2)) + "%, next seed: " + str(round(noise * 100, 2)) + "%")
+		print("Merged candles within tolerance" if change <= noise * MERGE_TOLERANCE else "Merged candles OUT of tolerance")
+		sys.exit()
+
+	if runner_args.calibrate_engine:
+		# per window the physics, the physics with the next seed as the noise floor, and the deposition engine,
+		# the deposition engine is as good as it gets when it agrees with the physics about as well as two physics seeds agree
+		catalog.refresh()
+		dataset = catalog.newest_snapshots()[0]
+		seed = int(runner_args.seed) if runner_args.seed else 1
+		print("Deposition engine calibration on " + dataset + ", slide threshold " + str(deposition.SLIDE_THRESHOLD) + " diameters")
+		for offset in CALIBRATION_OFFSETS:
+			bands = []
+			seconds = []
+			for engine, runSeed in (("physics", seed), ("physics", seed + 1), ("deposition", seed)):
+				cvt = create_benchmark_tank(dataset, runSeed, offset)
+				cvt.engine = engine
+				setupTime, physicsTime = cvt.benchmark_physics()
+				bands.append(cvt.get_accumulation_bands())
+				seconds.append(setupTime + physicsTime)
+				cvt.game_end()
+
+			print("Offset " + str(offset) + ": physics " + str(round(seconds[0], 2)) + "s, deposition " + str(round(seconds[2], 3)) + "s" + \
+				" | imbalance correlation with the physics " + str(round(deposition.get_imbalance_correlation(bands[0], bands[2]), 3)) + \
+				" (next seed " + str(round(deposition.get_imbalance_correlation(bands[0], bands[1]), 3)) + ")" + \
+				" | particles in another candle band " + str(round(convergence.get_histogram_change(bands[0], bands[2]) * 100, 1)) + "%" + \
+				" (next seed " + str(round(convergence.get_histogram_change(bands[0], bands[1]) * 100, 1)) + "%)")
+		sys.exit()
+
+	if runner_args.ensemble:
+		ensembleSize = int(runner_args.ensemble)
+		workerCount = int(runner_args.workers) if runner_args.workers else None
+		if ensembleSize < 1:
+			get_argument_parser().error("--ensemble needs at least 1 member")
+		if workerCount is not None and workerCount < 1:
+			get_argument_parser().error("--workers needs at least 1 worker")
+
+		# the members' arrays are folded into the bands as they come back, in whatever order they finish
+		catalog.refresh()
+		dataset = catalog.newest_snapshots()[0]
+		offset = int(runner_args.offset_index_override) if runner_args.offset_index_override else 0
+		seed = int(runner_args.seed) if runner_args.seed else 1
+		# the members run with the parsed settings minus the ensemble's own, passed along rather than parsed again in the workers
+		memberArgs = argparse.Namespace(**vars(runner_args))
+		memberArgs.ensemble = None
+		memberArgs.workers = None
+		members = [(dataset, seed + i, offset, memberArgs) for i in range(0, ensembleSize)]
+		bands = None
+		ohlcv_cache.load_ohlcv_cached(dataset) # built once here, the members map it instead of each parsing the CSV
+		pool = multiprocessing.Pool(workerCount)
+		try:
+			for memberSeed, imbalanceRatios in pool.imap_unordered(run_ensemble_member, members):
+				if bands is None:
+					bands = ensemble.ImbalanceBands(len(imbalanceRatios))
+				bands.update(imbalanceRatios)
+				print("Ensemble member " + str(bands.count) + "/" + str(len(members)) + " done, seed " + str(memberSeed))
+		finally:
+			pool.close()
+			pool.join()
+
+		# the histogram is drawn over the candles and overlays of the window, without particles
+		cvt = create_benchmark_tank(dataset, seed, offset, memberArgs)
+		cvt.ensemble_size = bands.count
+		cvt.draw_particles = False
+		cvt.game_start()
+		cvt.draw_frame()
+		cvt.make_histogram(cvt.get_frame_image(), bands.mean, [bands.get_quantile(q) for q in ensemble.QUANTILES])
+		bands.save(cvt.get_histogram_file_name() + "_ensemble.npz", [member[1] for member in members])
+		agreement = bands.get_agreement()
+		print("Ensemble of " + str(bands.count) + " saved to " + cvt.get_histogram_file_name() + ".png, members agree on buyers/sellers in " + \
+			str(round(np.mean(agreement) * 100, 1)) + "% on average, at least 80% agree in " + str(round(np.mean(agreement >= 0.8) * 100, 1)) + "% of the columns")
+		cvt.game_end()
+		sys.exit()
+
+	watcher = None
+	if runner_args.live:
+		watcher = csv_watcher.CSVWatcher(os.path.dirname(path_to_csv_files))
+
+	# In live mode one tank per series (symbol and timeframe) is kept and rolled to each new bar instead of being rebuilt,
+	# CSV_WRITER writes every new bar to a new snapshot file, the tank moves on to it.
+	live_tanks = {}
+	rolling_live_tank = watcher is not None and not runner_args.timeframes and not runner_args.sample_period_size and not runner_args.offset_index_override
+
+	for r in range(0, arbitraryRunLimit): 
+
+		dataset_list = []
+		if watcher is not None and r > 0:
+			events = watcher.wait_for_new_bars() # blocks until a bar is appended or rewritten, no directory rescan
+			dataset_list.append(events[-1].file_name)
+		else:
+			catalog.refresh() # only reads snapshots that appeared or were rewritten since the last pass
+			dataset_list = catalog.newest_snapshots() # newest first, snapshots that add no new bars are left out
+
+			if watcher is not None:
+				watcher.consume(dataset_list[0]) # load the newest file once, later bars are appended to it
+
+		for dataset in dataset_list[:1]: # Loop up to [:N] datasets e.g. [:3]		
+			# one parse serves every timeframe we watch, the higher timeframes are resampled from it
+			timeframes = [None]
+			if runner_args.timeframes:
+				timeframes = [int(t) for t in runner_args.timeframes.split(",")]
+				baseData = watcher.get_data(dataset) if watcher is not None else ohlcv_cache.load_ohlcv_cached(dataset)
+				timeframe_data = ohlcv_resample.resample_many(baseData, timeframes)
+
+			for timeframe in timeframes:
+				lookback = 0 # Default is 1. To loop iterations within a dataset use following loop with lookback. e.g., setting this to 60 will use one dataset to create 60 simulations, each one starting a candle earlier. Useful for looking for patterns on old data. Set lookback to 1 when running in a production/trading mode, assuming your CSV file is being updated in real time.	
+				i = 0
+				while i <= lookback:
+
+					series = csv_watcher.get_series(dataset)
+					if rolling_live_tank and series in live_tanks:
+						cvt = live_tanks[series]
+						if cvt.continues(watcher.get_data(dataset)) == True:
+							cvt.permutation_index = r
+							cvt.set_dataset_file(dataset)
+							cvt.indicators = update_live_indicators(dataset, watcher.get_data(dataset), cvt.sigma_period, cvt.sigma_compatible, cvt.WINDOW_HEIGHT)
+							print( "Current OHLC dataset: " + TextColors.HEADERLEFT2 + TextColors.INVERTED + dataset + TextColors.ENDC)
+							cvt.resume(watcher.get_data(dataset))
+							i += 1
+							continue
+						live_tanks.pop(series).game_end() # the bars were rewritten further back, the kept world no longer matches them
+
+					cvt = ControlVolumeTank() # The ControlVolumeTank is the class running the simulation.
+					lookback = int(cvt.sample_period_size) # override if this was passed in
+					cvt.permutation_index = r
+
+					if lookback > 0:
+						cvt.offset_index = i  # Sets an index based on where we are at in the lookback sequence. If lookback is 1 then we aren't running multiple simulations off the same dataset, but fresh ones every time.
+					if cvt.offset_index_override != 0:
+						cvt.offset_index = cvt.offset_index_override - i
+						print("Beginning at candle " + str( cvt.offset_index ))
+					cvt.dataset_file = dataset
+					if timeframe is not None:
+						cvt.ohlcv = timeframe_data[timeframe]
+						cvt.timeframe_label = "_" + str(timeframe) + "m"
+					elif watcher is not None:
+						cvt.ohlcv = watcher.get_data(dataset)
+						if cvt.offset_index == 0:
+							cvt.indicators = update_live_indicators(dataset, cvt.ohlcv, cvt.sigma_period, cvt.sigma_compatible, cvt.WINDOW_HEIGHT)
+					print( "Current OHLC dataset: " + TextColors.HEADERLEFT2 + TextColors.INVERTED + dataset + TextColors.ENDC)
+					random.seed()
+					cvt.set_particles_diameter( 2 )
+					cvt.set_candlestick_width( 3 )
+					cvt.set_particles_birth_count( particle_birth_count )
+					cvt.set_candle_gutter( 1 )
+					if rolling_live_tank:
+						cvt.keep_world = True
+						live_tanks[series] = cvt
+					cvt.game_run()
+					i += 1
@@ -0,0 +1,68 @@
+'''
+HOW IT WORKS:
+1. every few frames the tank hands the monitor one measure of the world state:
+   "sleeping"  the fraction of particles the physics engine has put to sleep
+   "energy"    the mean kinetic energy per particle, 1/2 m v^2
+   "histogram" the particle counts per column band, the monitor compares them with the previous check
+2. the tank counts as settled when the measure stays past its threshold for `patience` checks in a row
+3. the first min_frames frames never count, the particles are still falling in from the ceiling and floor
+4. FRAME_LIMIT stays the safety cap, a tank that never settles still stops there
+'''
+import numpy as np
+
+MODES = ("sleeping", "energy", "histogram")
+DEFAULT_THRESHOLDS = {"sleeping": 0.5, "energy": 1.0, "histogram": 0.03} # reached around frame 120-140, the bands are within 1% of where they end up by then
+HISTOGRAM_BAND_WIDTH = 8 # pixels per column band, single pixel columns flicker as particles jiggle
+
+def get_kinetic_energy(pMasses, pXVelocities, pYVelocities):
+	# mean per particle
+	if len(pMasses) == 0:
+		return 0.0
+	return float(np.mean(0.5 * pMasses * (pXVelocities * pXVelocities + pYVelocities * pYVelocities)))
+
+def get_column_counts(pX, pWidth, pBandWidth=1):
+	# particles per column band, particles outside the window are dropped
+	columns = np.floor(np.asarray(pX, dtype=np.float64) / pBandWidth).astype(np.int64)
+	bandCount = int(np.ceil(pWidth / float(pBandWidth)))
+	return np.bincount(columns[(columns >= 0) & (columns < bandCount)], minlength=bandCount)
+
+def get_histogram_change(pPrevious, pCurrent):
+	# share of the particles that moved to another band since the previous check
+	total = max(pCurrent.sum(), 1)
+	return float(np.abs(pCurrent - pPrevious).sum()) / (2.0 * total)
+
+class ConvergenceMonitor():
+
+	def __init__(self, pMode, pThreshold=None, pPatience=3, pMinFrames=20):
+		if pMode not in MODES:
+			raise ValueError("Unknown convergence mode " + str(pMode) + ", use one of " + ", ".join(MODES))
+		self.mode = pMode
+		self.threshold = DEFAULT_THRESHOLDS[pMode] if pThreshold is None else pThreshold
+		self.patience = pPatience
+		self.min_frames = pMinFrames
+		self.previous_counts = None
+		self.calm_checks = 0
+		self.last_value = None
+
+	def is_calm(self, pMeasure):
+		if self.mode == "sleeping":
+			self.last_value = pMeasure
+			return pMeasure >= self.threshold
+		if self.mode == "energy":
+			self.last_value = pMeasure
+			return pMeasure <= self.threshold
+
+		previous = self.previous_counts
+		self.previous_counts = pMeasure
+		if previous is None:
+			return False
+		self.last_value = get_histogram_change(previous, pMeasure)
+		return self.last_value <= self.threshold
+
+	def update(self, pFrame, pMeasure):
+		# returns True once the tank has settled
+		calm = self.is_calm(pMeasure)
+		if pFrame < self.min_frames:
+			return False
+		self.calm_checks = self.calm_checks + 1 if calm else 0
+		return self.calm_checks >= self.patience
@@ -0,0 +1,189 @@
+'''
+HOW IT WORKS:
+1. CSV_WRITER.mq4 names each dump Symbol_Periodm_date_Hour.Minute.csv, the catalog parses symbol, timeframe and snapshot time from that name
+2. every snapshot is indexed in a small SQLite file: size, mtime, row count, first/last bar and a content hash,
+   the file lives in CATALOG_DIRECTORY, one per csv directory, writing it inside the watched directory would touch its mtime
+3. refresh() only lists the directory when its mtime changed (a file was added, removed or renamed), then it only re-stats
+   the newest snapshot of each series, the one file CSV_WRITER and robocopy /MON overwrite in place, and indexes it again when
+   its size or mtime changed, only new and changed files are read and hashed
+4. snapshots are grouped by series, "USDJPY_15m" for CSV_WRITER names and the file name for any other CSV, a snapshot whose
+   last bar is not newer than an earlier snapshot of the same series adds no new bars and is flagged, so the runner never
+   simulates the same bars twice, the flags of a whole series are redone when any of its snapshots change
+'''
+import os
+import re
+import hashlib
+import sqlite3
+import fnmatch
+import lib.ohlcv as ohlcv
+import lib.csv_schema as csv_schema
+
+CATALOG_DIRECTORY = "../cache/"
+HASH_BLOCK_SIZE = 1048576
+
+# e.g. USDJPY_15m_2018.04.13_9.45.csv or USDJPY_15m_2018.04.13.csv
+SNAPSHOT_NAME = re.compile(r"^(?P<symbol>.+?)_(?P<period>\d+)m(?:_(?P<date>\d{4}\.\d{2}\.\d{2}))?(?:_(?P<hour>\d{1,2})\.(?P<minute>\d{1,2}))?\.csv$")
+
+def parse_snapshot_name(pFileName):
+	# returns symbol, timeframe in minutes and snapshot time (or None when the name doesn't say)
+	match = SNAPSHOT_NAME.match(os.path.basename(pFileName))
+	if match is None:
+		return None, None, None
+
+	snapshotTime = None
+	if match.group("date") is not None:
+		hour = int(match.group("hour") or 0)
+		minute = int(match.group("minute") or 0)
+		snapshotTime = ohlcv.to_timestamp(match.group("date"), "%02d:%02d" % (hour, minute))
+
+	return match.group("symbol"), int(match.group("period")), snapshotTime
+
+def get_series_name(pFileName):
+	# "USDJPY_15m" for CSV_WRITER snapshots, the file name without .csv for anything else
+	symbol, timeframe, snapshotTime = parse_snapshot_name(pFileName)
+	if symbol is None:
+		return os.path.splitext(os.path.basename(pFileName))[0]
+	return symbol + "_" + str(timeframe) + "m"
+
+def get_catalog_file_name(pDirectory, pCatalogDirectory=CATALOG_DIRECTORY):
+	directory = os.path.abspath(pDirectory)
+	return os.path.join(pCatalogDirectory, "csv_catalog_" + hashlib.sha1(directory.encode("utf-8")).hexdigest()[:8] + ".sqlite")
+
+def get_row_count_and_hash(pFileName):
+	rowCount = 0
+	sha = hashlib.sha1()
+	csvfile = open(pFileName, 'rb')
+	try:
+		while True:
+			block = csvfile.read(HASH_BLOCK_SIZE)
+			if not block:
+				break
+			sha.update(block)
+			rowCount += block.count(b"\n")
+	finally:
+		csvfile.close()
+	return rowCount, sha.hexdigest()
+
+def get_first_and_last_bar(pFileName):
+	schema, hasHeader = csv_schema.detect_file_schema(pFileName)
+	headLines = [l for l in csv_schema.read_head_lines(pFileName) if l.strip() != ""]
+	lastLines, rowsRead = ohlcv.read_tail_lines(pFileName, 1)
+	if len(lastLines) == 0 or len(headLines) == 0:
+		return None, None
+
+	bars = schema.parse_lines([headLines[1 if hasHeader else 0], lastLines[0]])
+	if len(bars) < 2:
+		return None, None
+	return str(bars.timestamps[0]), str(bars.timestamps[1])
+
+class CSVCatalog():
+
+	def __init__(self, pDirectory, pPattern="*.csv", pCatalogFile=None):
+		self.directory = pDirectory
+		self.pattern = pPattern
+		if pCatalogFile is None:
+			pCatalogFile = get_catalog_file_name(pDirectory)
+		if os.path.dirname(pCatalogFile) != "" and not os.path.exists(os.path.dirname(pCatalogFile)):
+			os.makedirs(os.path.dirname(pCatalogFile))
+		self.connection = sqlite3.connect(pCatalogFile)
+		self.connection.text_factory = str # plain str names under Python 2 too, they get concatenated with the byte string colors
+		columns = [row[1] for row in self.connection.execute("PRAGMA table_info(snapshots)")]
+		if len(columns) > 0 and "series" not in columns:
+			# a catalog from before snapshots were grouped by series, it only caches the files, so index them again
+			self.connection.execute("DROP TABLE snapshots")
+			self.connection.execute("DROP TABLE IF EXISTS settings")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS snapshots (" + \
+			"name TEXT PRIMARY KEY, series TEXT, symbol TEXT, timeframe INTEGER, snapshot_time TEXT, size INTEGER, mtime REAL, " + \
+			"row_count INTEGER, first_bar TEXT, last_bar TEXT, content_hash TEXT, adds_new_bars INTEGER)")
+		self.connection.execute("CREATE INDEX IF NOT EXISTS snapshots_by_series ON snapshots (series, mtime)")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+		self.connection.commit()
+
+	def get_setting(self, pKey):
+		row = self.connection.execute("SELECT value FROM settings WHERE key = ?", (pKey,)).fetchone()
+		return None if row is None else row[0]
+
+	def set_setting(self, pKey, pValue):
+		self.connection.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (pKey, pValue))
+
+	def index_file(self, pName):
+		fileName = os.path.join(self.directory, pName)
+		stat = os.stat(fileName)
+		symbol, timeframe, snapshotTime = parse_snapshot_name(pName)
+		rowCount, contentHash = get_row_count_and_hash(fileName)
+		firstBar, lastBar = get_first_and_last_bar(fileName)
+
+		self.connection.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)", \
+			(pName, get_series_name(pName), symbol, timeframe, snapshotTime, stat.st_size, stat.st_mtime, rowCount, firstBar, lastBar, contentHash))
+
+	def update_new_bar_flags(self, pSeries):
+		# a snapshot adds nothing if an older snapshot of the same series has the same content or reaches at least as far
+		for series in pSeries:
+			rows = self.connection.execute("SELECT name, mtime, last_bar, content_hash FROM snapshots WHERE series = ?", (series,)).fetchall()
+			for name, mtime, lastBar, contentHash in rows:
+				covered = self.connection.execute("SELECT COUNT(*) FROM snapshots WHERE name != ? AND " + \
+					"((series = ? AND last_bar >= ?) OR content_hash = ?) AND " + \
+					"(mtime < ? OR (mtime = ? AND name < ?))", \
+					(name, series, lastBar, contentHash, mtime, mtime, name)).fetchone()[0]
+				self.connection.execute("UPDATE snapshots SET adds_new_bars = ? WHERE name = ?", (0 if covered > 0 else 1, name))
+
+	def refresh(self):
+		# returns the names of the snapshots that were (re)indexed
+		series = set()
+		changed = []
+
+		directoryMtime = repr(os.stat(self.directory).st_mtime)
+		if directoryMtime != self.get_setting("directory_mtime"):
+			# a file was added, removed or renamed, the only time the directory is listed
+			names = set(n for n in os.listdir(self.directory) if fnmatch.fnmatch(n, self.pattern))
+			known = dict(self.connection.execute("SELECT name, series FROM snapshots").fetchall())
+			for name in set(known) - names:
+				self.connection.execute("DELETE FROM snapshots WHERE name = ?", (name,))
+				series.add(known[name])
+			for name in sorted(names - set(known)):
+				self.index_file(name)
+				changed.append(name)
+				series.add(get_series_name(name))
+			self.set_setting("directory_mtime", directoryMtime)
+
+		# older snapshots are never written again, only the newest of each series is checked for an in place rewrite
+		newest = self.connection.execute("SELECT name, series, size, mtime FROM snapshots AS s WHERE " + \
+			"mtime = (SELECT MAX(mtime) FROM snapshots WHERE series = s.series)").fetchall()
+		for name, seriesName, size, mtime in newest:
+			if name in changed:
+				continue
+			try:
+				stat = os.stat(os.path.join(self.directory, name))
+			except OSError:
+				continue # removed, the next listing drops it
+			if (size, mtime) != (stat.st_size, stat.st_mtime):
+				self.index_file(name)
+				changed.append(name)
+				series.add(seriesName)
+
+		if len(series) > 0:
+			self.update_new_bar_flags(series)
+		self.connection.commit()
+		return changed
+
+	def newest_snapshots(self, pOnlyNewBars=True):
+		# newest snapshot per series, newest first, as full paths
+		query = "SELECT name, MAX(mtime) FROM snapshots"
+		if pOnlyNewBars:
+			query += " WHERE adds_new_bars = 1"
+		query += " GROUP BY series ORDER BY MAX(mtime) DESC"
+		return [os.path.join(self.directory, row[0]) for row in self.connection.execute(query)]
+
+	def snapshots(self, pOnlyNewBars=True):
+		# (path, series) of every indexed snapshot, oldest first
+		query = "SELECT name, series FROM snapshots"
+		if pOnlyNewBars:
+			query += " WHERE adds_new_bars = 1"
+		query += " ORDER BY mtime, name"
+		return [(os.path.join(self.directory, row[0]), row[1]) for row in self.connection.execute(query)]
+
+	def get_snapshot(self, pFileName):
+		return self.connection.execute("SELECT * FROM snapshots WHERE name = ?", (os.path.basename(pFileName),)).fetchone()
+
+	def close(self):
+		self.connection.close()
@@ -0,0 +1,150 @@
+'''
+HOW IT WORKS:
+1. a CSVSchema describes one broker layout: how many columns, where the timestamp and the OHLCV columns are, how to read the time
+2. detect_schema looks at the header (if any) and the first data row and picks the first registered schema that matches
+3. parse_text tokenizes a whole chunk of text with one split, reshapes the tokens into a (rows x columns) array
+   and converts every column with numpy, there is no per-row Python loop
+4. new layouts are added with register_schema, everything downstream keeps reading the same OHLCVData arrays
+'''
+import re
+import numpy as np
+import lib.ohlcv as ohlcv
+
+HEAD_LINE_COUNT = 2
+
+def to_bytes_matrix(pStrings):
+	# fixed width byte view (rows x characters) of a string column, used to reorder date parts without a Python loop
+	tmpBytes = np.asarray(pStrings).astype("S")
+	return tmpBytes.view(np.uint8).reshape(len(tmpBytes), tmpBytes.dtype.itemsize)
+
+def from_byte_positions(pStrings, pPositions):
+	# builds YYYY-MM-DDTHH:MM strings, pPositions holds a source byte index or a literal character per output byte
+	source = to_bytes_matrix(pStrings)
+	result = np.empty((len(source), len(pPositions)), dtype=np.uint8)
+	for i, position in enumerate(pPositions):
+		if isinstance(position, int):
+			result[:, i] = source[:, position]
+		else:
+			result[:, i] = ord(position)
+	return result.view("S" + str(len(pPositions))).ravel().astype("datetime64[m]")
+
+def metatrader_timestamps(pColumns):
+	# 2018.03.14 and 14:15 in two columns
+	dates = from_byte_positions(pColumns[0], [0, 1, 2, 3, "-", 5, 6, "-", 8, 9])
+	times = to_bytes_matrix(pColumns[1]).astype(np.int64) - ord("0")
+	minutes = times[:, 0] * 600 + times[:, 1] * 60 + times[:, 3] * 10 + times[:, 4]
+	return dates.astype("datetime64[D]").astype("datetime64[m]") + minutes.astype("timedelta64[m]")
+
+def dukascopy_timestamps(pColumns):
+	# 14.03.2018 14:15:00.000 in one column
+	return from_byte_positions(pColumns[0], [6, 7, 8, 9, "-", 3, 4, "-", 0, 1, "T", 11, 12, ":", 14, 15])
+
+def iso_timestamps(pColumns):
+	# 2018-03-14 14:15[:00] or 2018-03-14T14:15[:00] in one column
+	return from_byte_positions(pColumns[0], [0, 1, 2, 3, "-", 5, 6, "-", 8, 9, "T", 11, 12, ":", 14, 15])
+
+class CSVSchema():
+
+	def __init__(self, pName, pRowPattern, pTimestampColumns, pPriceColumns, pVolumeColumn, pToTimestamps, pHeaderPattern=None, pDelimiter=","):
+		self.name = pName
+		self.row_pattern = re.compile(pRowPattern) # matched against the first data row
+		self.header_pattern = None if pHeaderPattern is None else re.compile(pHeaderPattern, re.IGNORECASE)
+		self.timestamp_columns = pTimestampColumns
+		self.price_columns = pPriceColumns # open, high, low, close
+		self.volume_column = pVolumeColumn
+		self.to_timestamps = pToTimestamps
+		self.delimiter = pDelimiter
+
+	def matches(self, pHeader, pFirstRow):
+		if pHeader is not None and self.header_pattern is not None and not self.header_pattern.match(pHeader):
+			return False
+		return self.row_pattern.match(pFirstRow) is not None
+
+	def tokenize(self, pText):
+		text = pText.replace("\r", "").strip("\n")
+		if text == "":
+			return np.empty((0, 0))
+
+		columnCount = text[:text.find("\n") if "\n" in text else len(text)].count(self.delimiter) + 1
+		tokens = np.array(text.replace("\n", self.delimiter).split(self.delimiter))
+		if len(tokens) % columnCount != 0 or "\n\n" in text:
+			# ragged or blank rows, drop them and try again
+			lines = [l for l in text.split("\n") if l.count(self.delimiter) + 1 == columnCount]
+			tokens = np.array(self.delimiter.join(lines).split(self.delimiter))
+		return tokens.reshape(-1, columnCount)
+
+	def parse_text(self, pText, pHasHeader=False):
+		if pHasHeader:
+			pText = pText[pText.find("\n") + 1:] if "\n" in pText else ""
+
+		tokens = self.tokenize(pText)
+		if len(tokens) == 0:
+			return ohlcv.OHLCVData(np.empty(0, dtype="datetime64[m]"), np.empty(0), np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+
+		prices = np.char.strip(tokens[:, self.price_columns]).astype(np.float64)
+		return ohlcv.OHLCVData(
+			self.to_timestamps([np.char.strip(tokens[:, c]) for c in self.timestamp_columns]),
+			np.ascontiguousarray(prices[:, 0]),
+			np.ascontiguousarray(prices[:, 1]),
+			np.ascontiguousarray(prices[:, 2]),
+			np.ascontiguousarray(prices[:, 3]),
+			np.char.strip(tokens[:, self.volume_column]).astype(np.float64))
+
+	def parse_lines(self, pLines):
+		return self.parse_text("\n".join(pLines))
+
+METATRADER = CSVSchema("metatrader", r"^\d{4}\.\d{2}\.\d{2},\d{2}:\d{2},", [0, 1], [2, 3, 4, 5], 6, metatrader_timestamps)
+DUKASCOPY = CSVSchema("dukascopy", r"^\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2}(\.\d+)?,", [0], [1, 2, 3, 4], 5, dukascopy_timestamps, r"^gmt time,")
+ISO = CSVSchema("iso", r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2})?[^,]*,", [0], [1, 2, 3, 4], 5, iso_timestamps)
+
+SCHEMAS = [METATRADER, DUKASCOPY, ISO]
+
+def register_schema(pSchema):
+	# newer registrations win, so a custom layout can shadow a built-in one
+	SCHEMAS.insert(0, pSchema)
+
+def has_header(pFirstLine):
+	# a header row starts with a letter, data rows start with a digit
+	return pFirstLine.strip() != "" and not pFirstLine.strip()[0].isdigit()
+
+def detect_schema(pLines):
+	lines = [l.strip() for l in pLines if l.strip() != ""]
+	if len(lines) == 0:
+		return METATRADER, False
+
+	header = lines[0] if has_header(lines[0]) else None
+	firstRow = lines[1] if header is not None and len(lines) > 1 else lines[0]
+	for schema in SCHEMAS:
+		if schema.matches(header, firstRow):
+			return schema, header is not None
+
+	raise ValueError("Unknown CSV layout, first row: " + firstRow)
+
+def read_head_lines(pFileName, pCount=HEAD_LINE_COUNT):
+	lines = []
+	csvfile = open(pFileName, 'r')
+	try:
+		for i in range(0, pCount):
+			lines.append(csvfile.readline())
+	finally:
+		csvfile.close()
+	return lines
+
+def detect_file_schema(pFileName):
+	return detect_schema(read_head_lines(pFileName))
+
+def load_ohlcv(pFileName):
+	schema, hasHeader = detect_file_schema(pFileName)
+	csvfile = open(pFileName, 'r')
+	try:
+		text = csvfile.read()
+	finally:
+		csvfile.close()
+	return schema.parse_text(text, hasHeader)
+
+def load_ohlcv_tail(pFileName, pCount):
+	schema, hasHeader = detect_file_schema(pFileName)
+	lines, rowsRead = ohlcv.read_tail_lines(pFileName, pCount)
+	if hasHeader and len(lines) > 0 and not schema.row_pattern.match(lines[0]):
+		lines = lines[1:] # the whole file fit in the window, including its header
+	return schema.parse_lines(lines), rowsRead
@@ -0,0 +1,274 @@
+'''
+HOW IT WORKS:
+1. every watched CSV remembers the byte offset of the last complete row it consumed
+2. when the file's size or mtime changes (inotify on Linux, polling with os.stat everywhere else) only the bytes after that offset are read
+3. the new rows are parsed and appended to an in-memory OHLCVBuffer, and a NewBarEvent is sent to every listener
+4. MT4 rewrites the forming bar in place, often at the same length, when the last consumed row no longer matches
+   the file is parsed again from the start of that row, if it is still the same bar it replaces the buffered one (event.revised)
+5. if the file shrank or the row there is another bar, the file was rewritten and is loaded again from the start
+6. CSV_WRITER starts a new file every minute, once a newer snapshot of the same symbol/timeframe is consumed
+   the older one's buffer is dropped and later changes to the older file are ignored
+'''
+import os
+import sys
+import time
+import struct
+import select
+import fnmatch
+import lib.ohlcv as ohlcv
+import lib.csv_schema as csv_schema
+import lib.csv_catalog as csv_catalog
+
+# inotify flags, see <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+INOTIFY_EVENT_HEADER = "iIII" # wd, mask, cookie, name length
+
+class NewBarEvent():
+
+	def __init__(self, pFileName, pData, pNewRowCount, pReloaded, pRevised=False):
+		self.file_name = pFileName
+		self.data = pData # OHLCVData view of every bar held for this file
+		self.new_row_count = pNewRowCount # bars after the last one held before
+		self.reloaded = pReloaded # True when the whole file had to be parsed again
+		self.revised = pRevised # True when the last bar held before was rewritten in place
+
+class InotifyWatch():
+
+	def __init__(self, pDirectory):
+		import ctypes, ctypes.util
+
+		self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+		self.fd = self.libc.inotify_init()
+		if self.fd < 0:
+			raise OSError(ctypes.get_errno(), "inotify_init failed")
+
+		mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+		if self.libc.inotify_add_watch(self.fd, pDirectory.encode("utf-8"), mask) < 0:
+			os.close(self.fd)
+			raise OSError(ctypes.get_errno(), "inotify_add_watch failed for " + pDirectory)
+
+	def wait(self, pTimeout):
+		# returns the names of the files that changed, or an empty list on timeout
+		readable, _, _ = select.select([self.fd], [], [], pTimeout)
+		if not readable:
+			return []
+
+		names = []
+		tmpBuffer = os.read(self.fd, 65536)
+		headerSize = struct.calcsize(INOTIFY_EVENT_HEADER)
+		position = 0
+		while position + headerSize <= len(tmpBuffer):
+			wd, mask, cookie, nameLength = struct.unpack_from(INOTIFY_EVENT_HEADER, tmpBuffer, position)
+			name = tmpBuffer[position + headerSize:position + headerSize + nameLength].rstrip(b"\0")
+			names.append(name if str is bytes else name.decode("utf-8")) # str under Python 2 and 3, like the catalog names
+			position += headerSize + nameLength
+		return names
+
+	def close(self):
+		os.close(self.fd)
+
+def get_stat(pFileName):
+	stat = os.stat(pFileName)
+	return stat.st_size, stat.st_mtime
+
+def get_series(pFileName):
+	# files whose names don't follow CSV_WRITER's are a series of their own
+	symbol, timeframe, snapshotTime = csv_catalog.parse_snapshot_name(pFileName)
+	return (symbol, timeframe) if symbol is not None else pFileName
+
+class CSVWatcher():
+
+	def __init__(self, pDirectory, pPattern="*.csv", pPollInterval=1.0):
+		self.directory = pDirectory
+		self.pattern = pPattern
+		self.poll_interval = pPollInterval
+		self.offsets = {} # file name -> byte offset just past the last consumed row
+		self.last_rows = {} # file name -> bytes of the last consumed row, used to detect rewrites
+		self.stats = {} # file name -> (size, mtime) seen by the last poll
+		self.buffers = {} # file name -> OHLCVBuffer
+		self.schemas = {} # file name -> (CSVSchema, has header), detected when the file is (re)loaded
+		self.series_files = {} # (symbol, timeframe) -> the snapshot file of that series that is buffered
+		self.listeners = []
+		self.inotify = None
+
+		# remember the current stats so only files that change from now on get parsed
+		for fileName in self.matching_files():
+			self.stats[fileName] = get_stat(fileName)
+
+		if sys.platform.startswith("linux"):
+			try:
+				self.inotify = InotifyWatch(pDirectory)
+			except (OSError, AttributeError):
+				self.inotify = None # fall back to polling
+
+	def add_listener(self, pCallback):
+		self.listeners.append(pCallback)
+
+	def get_data(self, pFileName):
+		return self.buffers[pFileName].data()
+
+	def matching_files(self):
+		return [os.path.join(self.directory, f) for f in os.listdir(self.directory) if fnmatch.fnmatch(f, self.pattern)]
+
+	def is_rewritten(self, pFileName, pCsvFile, pSize):
+		offset = self.offsets[pFileName]
+		if pSize < offset:
+			return True
+		lastRow = self.last_rows[pFileName]
+		if len(lastRow) == 0:
+			return False
+		pCsvFile.seek(offset - len(lastRow))
+		return pCsvFile.read(len(lastRow)) != lastRow
+
+	def get_snapshot_order(self, pFileName):
+		snapshotTime = csv_catalog.parse_snapshot_name(pFileName)[2]
+		return (snapshotTime or "", self.stats.get(pFileName, (0, 0))[1])
+
+	def is_superseded(self, pFileName):
+		# an older snapshot of a series that already has a newer one buffered
+		current = self.series_files.get(get_series(pFileName))
+		return current is not None and current != pFileName and self.get_snapshot_order(pFileName) < self.get_snapshot_order(current)
+
+	def hold_series(self, pFileName):
+		# the newer snapshot holds every bar of the older one, drop the older one's buffer
+		series = get_series(pFileName)
+		previous = self.series_files.get(series)
+		if previous is not None and previous != pFileName:
+			self.evict(previous)
+		self.series_files[series] = pFileName
+
+	def evict(self, pFileName):
+		for held in (self.buffers, self.offsets, self.last_rows, self.schemas):
+			held.pop(pFileName, None)
+
+	def forget(self, pFileName):
+		# the file is gone
+		self.evict(pFileName)
+		self.stats.pop(pFileName, None)
+		series = get_series(pFileName)
+		if self.series_files.get(series) == pFileName:
+			del self.series_files[series]
+
+	def read_rows(self, pFileName, pCsvFile, pOffset, pSize):
+		# parses the complete rows from pOffset on and moves the offset past them, None when there is no complete row
+		pCsvFile.seek(pOffset)
+		tmpBuffer = pCsvFile.read(pSize - pOffset)
+
+		# only complete rows, a row still being written is picked up on the next change
+		end = tmpBuffer.rfind(b"\n")
+		if end < 0:
+			return None
+
+		schema, hasHeader = self.schemas[pFileName]
+		newData = schema.parse_text(tmpBuffer[:end].decode("utf-8"), hasHeader and pOffset == 0)
+		self.offsets[pFileName] = pOffset + end + 1
+		self.last_rows[pFileName] = tmpBuffer[tmpBuffer.rfind(b"\n", 0, end) + 1:end + 1]
+		return newData
+
+	def revise_last_row(self, pFileName, pCsvFile, pSize):
+		# parses again from the start of the last consumed row, returns None when the first row there is not the same bar
+		lastRow = self.last_rows[pFileName]
+		buffer = self.buffers[pFileName]
+		offset = self.offsets[pFileName] - len(lastRow)
+		if len(lastRow) == 0 or buffer.size == 0 or pSize <= offset:
+			return None
+
+		lastTimestamp = buffer.timestamps[buffer.size - 1]
+		newData = self.read_rows(pFileName, pCsvFile, offset, pSize)
+		if newData is None or len(newData) == 0 or newData.timestamps[0] != lastTimestamp:
+			return None
+
+		buffer.truncate(buffer.size - 1)
+		buffer.extend(newData)
+		return NewBarEvent(pFileName, self.get_data(pFileName), len(newData) - 1, False, True)
+
+	def consume(self, pFileName):
+		# parses only the rows appended or rewritten since the last call, returns a NewBarEvent or None
+		stat = get_stat(pFileName)
+		self.stats[pFileName] = stat
+		if self.is_superseded(pFileName):
+			return None
+		self.hold_series(pFileName)
+		size = stat[0]
+
+		csvfile = open(pFileName, 'rb')
+		try:
+			if pFileName in self.buffers and self.is_rewritten(pFileName, csvfile, size):
+				event = self.revise_last_row(pFileName, csvfile, size)
+				if event is not None:
+					return event
+				self.evict(pFileName) # rewritten further back than the forming bar
+
+			reloaded = pFileName not in self.buffers
+			if reloaded == True:
+				self.buffers[pFileName] = ohlcv.OHLCVBuffer()
+				self.offsets[pFileName] = 0
+				self.last_rows[pFileName] = b""
+				self.schemas[pFileName] = csv_schema.detect_file_schema(pFileName)
+
+			newData = self.read_rows(pFileName, csvfile, self.offsets[pFileName], size)
+		finally:
+			csvfile.close()
+
+		if newData is None or len(newData) == 0:
+			return None
+
+		self.buffers[pFileName].extend(newData)
+		return NewBarEvent(pFileName, self.get_data(pFileName), len(newData), reloaded)
+
+	def poll(self, pFileNames=None):
+		# check the given files (or every matching file) and notify listeners about new or rewritten bars
+		events = []
+		if pFileNames is None:
+			pFileNames = self.matching_files()
+			for fileName in set(self.stats) - set(pFileNames):
+				self.forget(fileName)
+
+		for fileName in pFileNames:
+			if not os.path.exists(fileName):
+				self.forget(fileName)
+				continue
+			if self.stats.get(fileName) == get_stat(fileName):
+				continue
+			event = self.consume(fileName)
+			if event is not None:
+				events.append(event)
+
+		for event in events:
+			for listener in self.listeners:
+				listener(event)
+
+		return events
+
+	def wait_for_new_bars(self, pTimeout=None):
+		# blocks until at least one bar is appended or rewritten somewhere in the directory, or the timeout passes
+		startTime = time.time()
+		while True:
+			remaining = None
+			if pTimeout is not None:
+				remaining = pTimeout - (time.time() - startTime)
+				if remaining <= 0:
+					return []
+
+			if self.inotify is not None:
+				tmpTimeout = self.poll_interval if remaining is None else min(self.poll_interval, remaining)
+				names = self.inotify.wait(tmpTimeout)
+				names = [os.path.join(self.directory, n) for n in names if fnmatch.fnmatch(n, self.pattern)]
+				if len(names) == 0:
+					continue
+				events = self.poll(sorted(set(names)))
+			else:
+				events = self.poll()
+				if len(events) == 0:
+					time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+
+			if len(events) > 0:
+				return events
+
+	def close(self):
+		if self.inotify is not None:
+			self.inotify.close()
+			self.inotify = None
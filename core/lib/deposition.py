@@ -0,0 +1,80 @@
+'''
+HOW IT WORKS:
+1. a fast stand in for the rigid body physics (--engine deposition), it puts the particles where they would settle
+   instead of simulating how they get there
+2. the tank is cut into cells one particle diameter wide, each cell's surface is the top of the highest candle in it,
+   or the floor when no candle reaches into it, a heavy particle dropped at a column lands on that surface and piles up
+3. relax() lets the piles slide: a particle moves to the lower neighbor cell when the step down is more than
+   SLIDE_THRESHOLD diameters, like the bodies rolling off candle tops into the valleys between them
+4. below one diameter a particle on a level stretch can hop back and forth between two cells forever,
+   so relax() stops after SWEEPS passes, the counts per candle band stop changing long before that
+5. light particles are the same with the tank upside down: they rise to the bottoms of the candles and pile downwards
+6. get_imbalance_correlation compares two runs' heavy/light counts per candle band, the calibration report uses it
+'''
+import numpy as np
+
+SLIDE_THRESHOLD = 0.25 # in particle diameters, calibrated against the physics with --calibrate_engine
+SWEEPS = 200
+
+def get_surface(pBoxes, pWidth, pBaseY, pFromTop=True):
+	# per pixel column the y particles come to rest on, the candle tops (bottoms with pFromTop False, negated) over pBaseY
+	surface = np.full(pWidth, pBaseY, dtype=np.float64)
+	if len(pBoxes) == 0:
+		return surface
+	boxes = np.asarray(pBoxes, dtype=np.float64)
+	left = boxes[:, 2] - boxes[:, 0] / 2.0
+	right = boxes[:, 2] + boxes[:, 0] / 2.0
+	span = int(np.ceil(boxes[:, 0].max())) + 1
+	columns = np.floor(left).astype(np.int64)[:, None] + np.arange(span)[None, :]
+	inside = (columns + 0.5 >= left[:, None]) & (columns + 0.5 < right[:, None]) & (columns >= 0) & (columns < pWidth)
+	edge = boxes[:, 3] - boxes[:, 1] / 2.0 if pFromTop == True else -(boxes[:, 3] + boxes[:, 1] / 2.0)
+	np.minimum.at(surface, columns[inside], np.repeat(edge[:, None], span, axis=1)[inside])
+	return surface
+
+def relax(pSurface, pCounts, pGrainHeight, pThreshold, pSweeps=SWEEPS):
+	# slides particles to lower neighbor cells, returns the new counts per cell
+	counts = np.asarray(pCounts, dtype=np.int64).copy()
+	wall = np.array([-np.inf]) # nothing slides out of the tank
+	for sweep in range(0, pSweeps):
+		level = pSurface - pGrainHeight * counts
+		dropLeft = np.concatenate([wall, level[:-1]]) - level
+		dropRight = np.concatenate([level[1:], wall]) - level
+		toRight = (dropRight > pThreshold) & (dropRight >= dropLeft) & (counts > 0)
+		toLeft = (dropLeft > pThreshold) & (dropLeft > dropRight) & (counts > 0)
+		drop = np.where(toRight, dropRight, dropLeft)
+		# a steep step sheds several particles at once, about half the difference
+		moving = np.where(toRight | toLeft, np.maximum(np.floor((drop - pThreshold) / (2.0 * pGrainHeight)), 1), 0)
+		moving = np.minimum(moving, counts).astype(np.int64)
+		if moving.sum() == 0:
+			break
+		counts -= moving
+		counts[1:] += np.where(toRight, moving, 0)[:-1]
+		counts[:-1] += np.where(toLeft, moving, 0)[1:]
+	return counts
+
+def settle(pBoxes, pBirthX, pWidth, pBaseY, pDiameter, pFromTop=True):
+	# x and y of every particle after settling, pBirthX are the columns the particles start in
+	cellWidth = max(int(round(pDiameter)), 1)
+	cellCount = pWidth // cellWidth
+	surface = get_surface(pBoxes, pWidth, pBaseY if pFromTop == True else -pBaseY, pFromTop)
+	surface = surface[:cellCount * cellWidth].reshape(cellCount, cellWidth).min(axis=1) # a particle rests on the highest column under it
+
+	cells = np.clip((np.asarray(pBirthX, dtype=np.float64) // cellWidth).astype(np.int64), 0, cellCount - 1)
+	counts = relax(surface, np.bincount(cells, minlength=cellCount), pDiameter, SLIDE_THRESHOLD * pDiameter)
+
+	x = np.repeat((np.arange(cellCount) + 0.5) * cellWidth, counts)
+	layer = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) # 0 is the particle on the surface
+	y = np.repeat(surface, counts) - pDiameter * (layer + 0.5)
+	return x, y if pFromTop == True else -y
+
+def deposit(pBoxes, pHeavyX, pLightX, pWidth, pHeight, pWallWidth, pDiameter):
+	# (heavy x, heavy y), (light x, light y), heavy particles fall on the candles from the ceiling, light ones rise from the floor
+	floorY = pHeight - pWallWidth * 1.5
+	ceilingY = pWallWidth * 1.5
+	return settle(pBoxes, pHeavyX, pWidth, floorY, pDiameter, True), settle(pBoxes, pLightX, pWidth, ceilingY, pDiameter, False)
+
+def get_imbalance_correlation(pBands, pOtherBands):
+	# correlation of log((light + 1) / (heavy + 1)) per band, the bands are heavy counts then light counts like get_accumulation_bands
+	bands = np.asarray(pBands, dtype=np.float64).reshape(2, -1)
+	otherBands = np.asarray(pOtherBands, dtype=np.float64).reshape(2, -1)
+	return float(np.corrcoef(np.log((bands[1] + 1.0) / (bands[0] + 1.0)), np.log((otherBands[1] + 1.0) / (otherBands[0] + 1.0)))[0, 1])
@@ -0,0 +1,62 @@
+'''
+HOW IT WORKS:
+1. an ensemble runs N members of the same window with seeds base_seed, base_seed + 1, ... so any member can be rerun alone with --seed
+2. the members run in a multiprocessing pool, each worker process builds its own tank and physics world
+3. ImbalanceBands folds every member's (columns x 2) imbalance array in as it arrives and never keeps the members:
+   Welford's running mean and variance per column, plus a per column count of log(light / heavy) over fixed bins for the quantiles
+4. the mean array is drawn like the imbalance array of a single run, the quantile bands around it,
+   the agreement per column is the share of members on the majority's side, buyers or sellers
+'''
+import numpy as np
+
+QUANTILES = (0.1, 0.9) # the band drawn around the mean
+QUANTILE_BINS = 240
+LOG_RATIO_LIMIT = 6.0 # log(light / heavy) beyond +-6 (about 400 to 1) lands in the outermost bins
+
+class ImbalanceBands():
+
+	def __init__(self, pColumnCount, pBinCount=QUANTILE_BINS, pLimit=LOG_RATIO_LIMIT):
+		self.count = 0
+		self.mean = np.zeros((pColumnCount, 2))
+		self.m2 = np.zeros((pColumnCount, 2)) # sum of squared differences from the mean
+		self.bin_count = pBinCount
+		self.limit = pLimit
+		self.bin_counts = np.zeros((pColumnCount, pBinCount), dtype=np.int64)
+		self.light_members = np.zeros(pColumnCount, dtype=np.int64) # members with more light than heavy particles in the column
+		self.heavy_members = np.zeros(pColumnCount, dtype=np.int64)
+
+	def update(self, pImbalanceRatios):
+		ratios = np.asarray(pImbalanceRatios, dtype=np.float64)
+		self.count += 1
+		delta = ratios - self.mean
+		self.mean += delta / self.count
+		self.m2 += delta * (ratios - self.mean)
+
+		logRatios = np.log(ratios[:, 1])
+		bins = np.clip(((logRatios + self.limit) / (2.0 * self.limit) * self.bin_count).astype(np.int64), 0, self.bin_count - 1)
+		self.bin_counts[np.arange(len(bins)), bins] += 1
+		self.light_members += logRatios > 0
+		self.heavy_members += logRatios < 0
+
+	def get_variance(self):
+		if self.count < 2:
+			return np.zeros_like(self.mean)
+		return self.m2 / (self.count - 1)
+
+	def get_standard_error(self):
+		return np.sqrt(self.get_variance() / max(self.count, 1))
+
+	def get_quantile(self, pQuantile):
+		# the (columns x 2) imbalance array at quantile pQuantile of log(light / heavy), to the resolution of the bins
+		cumulative = np.cumsum(self.bin_counts, axis=1)
+		bins = np.argmax(cumulative >= max(pQuantile * self.count, 1), axis=1)
+		logRatios = (bins + 0.5) / self.bin_count * 2.0 * self.limit - self.limit
+		return np.column_stack([-np.exp(-logRatios), np.exp(logRatios)])
+
+	def get_agreement(self):
+		return np.maximum(self.light_members, self.heavy_members) / float(max(self.count, 1))
+
+	def save(self, pFileName, pSeeds):
+		np.savez(pFileName, count=self.count, seeds=np.asarray(pSeeds), mean=self.mean, variance=self.get_variance(), \
+			standard_error=self.get_standard_error(), quantiles=np.asarray(QUANTILES), \
+			quantile_bands=np.array([self.get_quantile(q) for q in QUANTILES]), agreement=self.get_agreement())
@@ -0,0 +1,78 @@
+'''
+HOW IT WORKS:
+1. an offset sweep (-oo with -sps) builds one tank per offset, every window is the previous one shifted back by a candle
+2. instead of each tank recomputing the indicators of its window, they are computed once over every bar of the data
+   and kept in memory, keyed by the file's content hash, the timeframe, the bar count and the indicator settings
+3. a tank gets numpy views of the slice under its window, so a 200 offset sweep pays for the indicators once
+4. a window's oldest candles read the real bars before the window instead of wrapping around to its newest bars,
+   the same as the live StreamingIndicators
+5. get_sigma_sweep computes the same series for a list of sigma periods in one pass, one matrix row per period
+'''
+import os
+import numpy as np
+import lib.standard_deviation_function as sdef
+import lib.money_flow_index as money_flow_index
+import lib.csv_catalog as csv_catalog
+
+MEMO_SIZE = 8 # full series kept at once, one per file/timeframe/settings combination
+SERIES_NAMES = ("price_sd", "volume_sd", "mfi", "mfi_y", "mfi_sd")
+
+memo = {}
+memo_order = [] # oldest key first, evicted once the memo is full
+file_hashes = {} # (path, size, mtime) -> content hash, so an unchanged file is hashed once
+
+def get_file_hash(pFileName):
+	stat = os.stat(pFileName)
+	key = (os.path.abspath(pFileName), stat.st_size, stat.st_mtime)
+	if key not in file_hashes:
+		rowCount, file_hashes[key] = csv_catalog.get_row_count_and_hash(pFileName)
+	return file_hashes[key]
+
+class IndicatorSeries():
+
+	def __init__(self, pData, pSigmaPeriod, pCompatible=True, pMfiChartHeight=720):
+		self.length = len(pData)
+		self.series = {}
+		self.series["price_sd"] = sdef.getRollingStandardDeviation(pData.close, pSigmaPeriod, pCompatible)
+		self.series["volume_sd"] = sdef.getRollingStandardDeviation(pData.volume, pSigmaPeriod, pCompatible, True)
+		self.series["mfi"] = money_flow_index.getMoneyFlowIndex(pData.high, pData.low, pData.volume, pSigmaPeriod)
+		self.series["mfi_y"] = np.interp(self.series["mfi"], [0, 100], [pMfiChartHeight, 0]) # same as interpolate_mfi
+		self.series["mfi_sd"] = money_flow_index.getMoneyFlowIndexStandardDeviation(self.series["mfi_y"], pSigmaPeriod)
+
+	def window(self, pStart, pStop):
+		# views, nothing is copied
+		return [self.series[name][pStart:pStop] for name in SERIES_NAMES]
+
+	def tail(self, pCount, pOffset=0):
+		# the same rows OHLCVData.tail(pCount, pOffset) selects
+		stop = self.length - pOffset
+		return self.window(max(0, stop - pCount), stop)
+
+def get_indicator_series(pFileName, pData, pSigmaPeriod, pCompatible=True, pMfiChartHeight=720, pLabel=""):
+	key = (get_file_hash(pFileName), pLabel, len(pData), pSigmaPeriod, pCompatible, pMfiChartHeight)
+	if key in memo:
+		return memo[key]
+
+	memo[key] = IndicatorSeries(pData, pSigmaPeriod, pCompatible, pMfiChartHeight)
+	memo_order.append(key)
+	if len(memo_order) > MEMO_SIZE:
+		del memo[memo_order.pop(0)]
+	return memo[key]
+
+def get_sigma_sweep(pData, pPeriods, pCompatible=True, pMfiChartHeight=720):
+	# {series name: (periods x candles) matrix}, row p is what a run with --sigma_period pPeriods[p] computes
+	sweep = {}
+	sweep["price_sd"] = sdef.getRollingStandardDeviationMatrix(pData.close, pPeriods, pCompatible)
+	sweep["volume_sd"] = sdef.getRollingStandardDeviationMatrix(pData.volume, pPeriods, pCompatible, True)
+	sweep["mfi"] = money_flow_index.getMoneyFlowIndexMatrix(pData.high, pData.low, pData.volume, pPeriods)
+	sweep["mfi_y"] = np.interp(sweep["mfi"], [0, 100], [pMfiChartHeight, 0])
+	sweep["mfi_sd"] = money_flow_index.getMoneyFlowIndexStandardDeviationMatrix(sweep["mfi_y"], pPeriods)
+	return sweep
+
+def save_sigma_sweep(pFileName, pSweep, pPeriods, pTimestamps):
+	np.savez(pFileName, periods=np.asarray(pPeriods), timestamps=np.asarray(pTimestamps).astype("datetime64[m]").astype(np.int64), **pSweep)
+
+def clear():
+	memo.clear()
+	del memo_order[:]
+	file_hashes.clear()
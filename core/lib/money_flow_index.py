@@ -0,0 +1,89 @@
+'''
+HOW IT WORKS:
+1. for every candle take the lookback window of highs, lows and volumes, ordered present to past (same windows as the SD lines)
+2. walking the window from past to present, a high above the next newer high adds high * volume to the positive money flow,
+   a low below the next newer low adds low * volume to the negative money flow
+3. MFI = 100 * positive / (positive + negative)
+4. the MFI standard deviation at candle i uses the sigma_period - 1 MFI values before it, oldest first,
+   and holds 0 until i reaches sigma_period
+All of it is computed for the whole series at once, the sums run in the same order as the original per-candle loops.
+'''
+import numpy as np
+import lib.standard_deviation_function as sdef
+
+def getMoneyFlowIndex(pHigh, pLow, pVolume, pPeriod):
+	length = len(pHigh)
+	if length == 0:
+		return np.empty(0)
+
+	indexes = sdef.getWindowIndexes(length, pPeriod)
+	highs = np.asarray(pHigh, dtype=np.float64)[indexes]
+	lows = np.asarray(pLow, dtype=np.float64)[indexes]
+	volumes = np.asarray(pVolume, dtype=np.float64)[indexes]
+
+	positiveFlow = np.zeros(length)
+	negativeFlow = np.zeros(length)
+	for i in range(pPeriod - 1, 0, -1):
+		positiveFlow = positiveFlow + np.where(highs[:, i] > highs[:, i - 1], highs[:, i] * volumes[:, i], 0.0)
+		negativeFlow = negativeFlow + np.where(lows[:, i] < lows[:, i - 1], lows[:, i] * volumes[:, i], 0.0)
+
+	totalFlow = positiveFlow + negativeFlow
+	with np.errstate(invalid='ignore', divide='ignore'):
+		# a window without any money flow (flat prices) sits in the middle
+		return np.where(totalFlow > 0, 100 * (positiveFlow / totalFlow), 50.0)
+
+def getMoneyFlowIndexStandardDeviation(pMfiValues, pPeriod):
+	values = np.asarray(pMfiValues, dtype=np.float64)
+	result = np.zeros(len(values))
+	if len(values) <= pPeriod or pPeriod < 2:
+		return result
+
+	candles = np.arange(pPeriod, len(values))
+	indexes = candles[:, None] - pPeriod + 1 + np.arange(pPeriod - 1)[None, :]
+	result[pPeriod:] = sdef.getWindowStandardDeviation(values[indexes])
+	return result
+
+def getMoneyFlowIndexMatrix(pHigh, pLow, pVolume, pPeriods):
+	# one row per period, the windows of the longest period are gathered once and shorter periods skip the older columns
+	length = len(pHigh)
+	if length == 0 or len(pPeriods) == 0:
+		return np.empty((len(pPeriods), length))
+
+	widest = max(pPeriods)
+	indexes = sdef.getWindowIndexes(length, widest)
+	highs = np.asarray(pHigh, dtype=np.float64)[indexes]
+	lows = np.asarray(pLow, dtype=np.float64)[indexes]
+	volumes = np.asarray(pVolume, dtype=np.float64)[indexes]
+	periods = np.asarray(pPeriods)[:, None]
+
+	positiveFlow = np.zeros((len(pPeriods), length))
+	negativeFlow = np.zeros((len(pPeriods), length))
+	for i in range(widest - 1, 0, -1):
+		used = i < periods
+		positiveFlow = positiveFlow + np.where(used & (highs[:, i] > highs[:, i - 1]), highs[:, i] * volumes[:, i], 0.0)
+		negativeFlow = negativeFlow + np.where(used & (lows[:, i] < lows[:, i - 1]), lows[:, i] * volumes[:, i], 0.0)
+
+	totalFlow = positiveFlow + negativeFlow
+	with np.errstate(invalid='ignore', divide='ignore'):
+		return np.where(totalFlow > 0, 100 * (positiveFlow / totalFlow), 50.0)
+
+def getMoneyFlowIndexStandardDeviationMatrix(pMfiMatrix, pPeriods):
+	# row p is getMoneyFlowIndexStandardDeviation(pMfiMatrix[p], pPeriods[p]), the previous values are right aligned
+	values = np.asarray(pMfiMatrix, dtype=np.float64)
+	length = values.shape[1]
+	result = np.zeros(values.shape)
+	width = max(pPeriods) - 1
+	if length == 0 or width < 1:
+		return result
+
+	indexes = np.maximum(np.arange(length)[:, None] - width + np.arange(width)[None, :], 0)
+	windows = values[:, indexes].reshape(-1, width)
+	periods = np.asarray(pPeriods)
+	mask = np.repeat(np.arange(width)[None, :] >= width - (periods[:, None] - 1), length, axis=0)
+	with np.errstate(invalid='ignore', divide='ignore'):
+		deviations = sdef.getMaskedWindowStandardDeviation(windows, mask).reshape(values.shape)
+
+	for row, period in enumerate(pPeriods):
+		if length > period and period >= 2:
+			result[row, period:] = deviations[row, period:]
+	return result
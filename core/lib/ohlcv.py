@@ -0,0 +1,114 @@
+'''
+HOW IT WORKS:
+1. a CSV is parsed once (see lib/csv_schema.py) into typed numpy columns: timestamps, open, high, low, close, volume
+2. OHLCVData holds those columns, every stage of the tank reads these arrays instead of re-splitting text rows
+3. windows of the data are numpy views, slicing never copies
+4. when only the newest rows are needed, read_tail_lines seeks backward from the end of the file block by block
+5. OHLCVBuffer grows in place for live data, appending a bar costs one row, not a copy of the whole history
+'''
+import numpy as np
+
+TAIL_BLOCK_SIZE = 65536
+
+class OHLCVData():
+
+	def __init__(self, pTimestamps, pOpen, pHigh, pLow, pClose, pVolume):
+		self.timestamps = pTimestamps # numpy datetime64[m]
+		self.open = pOpen # numpy float64, same for the rest
+		self.high = pHigh
+		self.low = pLow
+		self.close = pClose
+		self.volume = pVolume
+
+	def __len__(self):
+		return len(self.close)
+
+	def window(self, pStart, pStop):
+		# slicing numpy arrays returns views, so windows never copy the underlying data
+		return OHLCVData(self.timestamps[pStart:pStop], self.open[pStart:pStop], self.high[pStart:pStop], \
+			self.low[pStart:pStop], self.close[pStart:pStop], self.volume[pStart:pStop])
+
+	def tail(self, pCount, pOffset=0):
+		# the last pCount rows, shifted pOffset rows back from the newest bar
+		stop = len(self) - pOffset
+		start = max(0, stop - pCount)
+		return self.window(start, stop)
+
+	def window_ending_at(self, pTimestamp, pCount, pOffset=0):
+		# the pCount rows up to and including the bar at pTimestamp, found with a binary search
+		stop = int(np.searchsorted(self.timestamps, np.datetime64(pTimestamp, "m"), side="right")) - pOffset
+		start = max(0, stop - pCount)
+		return self.window(start, max(start, stop))
+
+class OHLCVBuffer():
+
+	def __init__(self, pCapacity=1024):
+		self.size = 0
+		self.timestamps = np.empty(pCapacity, dtype="datetime64[m]")
+		self.columns = np.empty((5, pCapacity), dtype=np.float64) # open, high, low, close, volume
+
+	def reserve(self, pCapacity):
+		if pCapacity <= len(self.timestamps):
+			return
+		newCapacity = max(pCapacity, len(self.timestamps) * 2) # double, so appends stay amortized O(1)
+		tmpTimestamps = np.empty(newCapacity, dtype="datetime64[m]")
+		tmpTimestamps[:self.size] = self.timestamps[:self.size]
+		tmpColumns = np.empty((5, newCapacity), dtype=np.float64)
+		tmpColumns[:, :self.size] = self.columns[:, :self.size]
+		self.timestamps = tmpTimestamps
+		self.columns = tmpColumns
+
+	def extend(self, pData):
+		count = len(pData)
+		self.reserve(self.size + count)
+		self.timestamps[self.size:self.size + count] = pData.timestamps
+		self.columns[0, self.size:self.size + count] = pData.open
+		self.columns[1, self.size:self.size + count] = pData.high
+		self.columns[2, self.size:self.size + count] = pData.low
+		self.columns[3, self.size:self.size + count] = pData.close
+		self.columns[4, self.size:self.size + count] = pData.volume
+		self.size += count
+
+	def clear(self):
+		self.size = 0
+
+	def truncate(self, pSize):
+		self.size = min(self.size, pSize)
+
+	def data(self):
+		# views of the filled part, they go stale once the buffer grows again
+		return OHLCVData(self.timestamps[:self.size], self.columns[0, :self.size], self.columns[1, :self.size], \
+			self.columns[2, :self.size], self.columns[3, :self.size], self.columns[4, :self.size])
+
+def to_timestamp(pDate, pTime):
+	# MetaTrader writes 2018.03.14 and 14:15
+	return pDate.strip().replace(".", "-") + "T" + pTime.strip()
+
+def read_tail_lines(pFileName, pCount, pBlockSize=TAIL_BLOCK_SIZE):
+	# returns the last pCount non-blank rows and the number of complete rows actually read from disk,
+	# so the cost stays constant no matter how much history the file holds
+	csvfile = open(pFileName, 'rb')
+	try:
+		csvfile.seek(0, 2)
+		position = csvfile.tell()
+		tmpBuffer = b""
+		lines = []
+
+		while position > 0:
+			readSize = min(pBlockSize, position)
+			position -= readSize
+			csvfile.seek(position)
+			tmpBuffer = csvfile.read(readSize) + tmpBuffer
+
+			lines = tmpBuffer.split(b"\n")
+			if position > 0:
+				lines = lines[1:] # the first piece may be a partial row
+			lines = [l for l in lines if l.strip() != b""]
+
+			if len(lines) >= pCount:
+				break
+	finally:
+		csvfile.close()
+
+	rowsRead = len(lines)
+	return [l.decode("utf-8").rstrip("\r") for l in lines[-pCount:]], rowsRead
@@ -0,0 +1,129 @@
+'''
+HOW IT WORKS:
+1. every symbol/timeframe gets one archive directory with a binary file per column (timestamps, open, high, low, close, volume)
+2. ingesting a CSV_WRITER snapshot appends only the bars newer than the last archived bar, the bar timestamp is the key
+3. the newest archived bar may still have been forming when it was written, so a snapshot with the same timestamp overwrites it
+4. bars that fall inside the archived range but are missing from it (gaps) cause a one-off merged rewrite
+5. reading memory maps the columns, windows are sliced by offset or by timestamp with a binary search
+'''
+import os
+import shutil
+import numpy as np
+import lib.ohlcv as ohlcv
+
+ARCHIVE_DIRECTORY = "../archive/"
+COLUMN_NAMES = ["timestamps", "open", "high", "low", "close", "volume"]
+
+def get_series_name(pSymbol, pTimeframe):
+	return pSymbol + "_" + str(pTimeframe) + "m"
+
+def get_column_file(pSeriesDirectory, pColumnName):
+	return os.path.join(pSeriesDirectory, pColumnName + ".bin")
+
+def get_column_arrays(pData):
+	# timestamps are stored as int64 minutes, everything else as float64
+	return [np.ascontiguousarray(pData.timestamps.astype(np.int64)), np.ascontiguousarray(pData.open, dtype=np.float64), \
+		np.ascontiguousarray(pData.high, dtype=np.float64), np.ascontiguousarray(pData.low, dtype=np.float64), \
+		np.ascontiguousarray(pData.close, dtype=np.float64), np.ascontiguousarray(pData.volume, dtype=np.float64)]
+
+class OHLCVArchive():
+
+	def __init__(self, pArchiveDirectory=ARCHIVE_DIRECTORY):
+		self.archive_directory = pArchiveDirectory
+
+	def get_series_directory(self, pSeriesName):
+		return os.path.join(self.archive_directory, pSeriesName)
+
+	def get_length(self, pSeriesName):
+		# columns are appended one after the other, a crash in between leaves them uneven, so trust the shortest
+		seriesDirectory = self.get_series_directory(pSeriesName)
+		lengths = []
+		for name in COLUMN_NAMES:
+			fileName = get_column_file(seriesDirectory, name)
+			lengths.append(os.path.getsize(fileName) // 8 if os.path.exists(fileName) else 0)
+		return min(lengths)
+
+	def load(self, pSeriesName):
+		seriesDirectory = self.get_series_directory(pSeriesName)
+		length = self.get_length(pSeriesName)
+		if length == 0:
+			return ohlcv.OHLCVData(np.empty(0, dtype="datetime64[m]"), np.empty(0), np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+
+		columns = []
+		for name in COLUMN_NAMES:
+			dtype = np.int64 if name == "timestamps" else np.float64
+			columns.append(np.memmap(get_column_file(seriesDirectory, name), dtype=dtype, mode='r', shape=(length,)))
+
+		return ohlcv.OHLCVData(columns[0].view("datetime64[m]"), columns[1], columns[2], columns[3], columns[4], columns[5])
+
+	def load_window(self, pSeriesName, pCount, pOffset=0, pEndTimestamp=None):
+		data = self.load(pSeriesName)
+		if pEndTimestamp is not None:
+			return data.window_ending_at(pEndTimestamp, pCount, pOffset)
+		return data.tail(pCount, pOffset)
+
+	def append(self, pSeriesName, pData, pLength):
+		seriesDirectory = self.get_series_directory(pSeriesName)
+		for name, column in zip(COLUMN_NAMES, get_column_arrays(pData)):
+			columnFile = open(get_column_file(seriesDirectory, name), 'r+b' if pLength > 0 else 'wb')
+			try:
+				columnFile.seek(pLength * 8) # also drops the tail of an uneven column
+				columnFile.truncate()
+				columnFile.write(column.tobytes())
+			finally:
+				columnFile.close()
+
+	def rewrite(self, pSeriesName, pData):
+		seriesDirectory = self.get_series_directory(pSeriesName)
+		tmpDirectory = seriesDirectory + ".tmp"
+		if os.path.exists(tmpDirectory):
+			shutil.rmtree(tmpDirectory)
+		os.makedirs(tmpDirectory)
+		for name, column in zip(COLUMN_NAMES, get_column_arrays(pData)):
+			column.tofile(get_column_file(tmpDirectory, name))
+		for name in COLUMN_NAMES:
+			os.rename(get_column_file(tmpDirectory, name), get_column_file(seriesDirectory, name))
+		os.rmdir(tmpDirectory)
+
+	def ingest(self, pSeriesName, pData):
+		# merges a snapshot into the series, returns the number of bars that were new
+		seriesDirectory = self.get_series_directory(pSeriesName)
+		if not os.path.exists(seriesDirectory):
+			os.makedirs(seriesDirectory)
+
+		order = np.argsort(pData.timestamps, kind="mergesort")
+		snapshot = ohlcv.OHLCVData(pData.timestamps[order], pData.open[order], pData.high[order], \
+			pData.low[order], pData.close[order], pData.volume[order])
+
+		archived = self.load(pSeriesName)
+		length = len(archived)
+		if length == 0:
+			self.append(pSeriesName, snapshot, 0)
+			return len(snapshot)
+
+		lastTimestamp = archived.timestamps[length - 1]
+		newer = int(np.searchsorted(snapshot.timestamps, lastTimestamp, side="right"))
+
+		# bars older than the last archived one that the archive doesn't have yet
+		older = snapshot.window(0, newer)
+		positions = np.searchsorted(archived.timestamps, older.timestamps)
+		positions = np.minimum(positions, length - 1)
+		missing = archived.timestamps[positions] != older.timestamps
+
+		if missing.any():
+			merged = np.concatenate([archived.timestamps, older.timestamps[missing]])
+			keep = np.argsort(merged, kind="mergesort")
+			columns = [np.concatenate([getattr(archived, name), getattr(older, name)[missing]])[keep] for name in COLUMN_NAMES[1:]]
+			archived = ohlcv.OHLCVData(merged[keep], columns[0], columns[1], columns[2], columns[3], columns[4])
+			self.rewrite(pSeriesName, ohlcv.OHLCVData(archived.timestamps, np.array(archived.open), np.array(archived.high), \
+				np.array(archived.low), np.array(archived.close), np.array(archived.volume)))
+			length = len(archived)
+
+		# the newest archived bar may have been forming, let the snapshot's copy of it win
+		start = newer
+		if newer > 0 and snapshot.timestamps[newer - 1] == lastTimestamp:
+			start = newer - 1
+			length = length - 1
+
+		self.append(pSeriesName, snapshot.window(start, len(snapshot)), length)
+		return len(snapshot) - newer + int(missing.sum())
@@ -0,0 +1,111 @@
+'''
+HOW IT WORKS:
+1. the first read of a CSV parses it with lib.csv_schema and writes a binary copy to CACHE_DIRECTORY (<csv name>.<directory hash>.ohlcv.npy),
+   not next to the CSV, the csv directory is watched and a file written there would look like a change to it
+2. the copy holds one int64 row per column (timestamp, open, high, low, close, volume), prices stored as float64 bit patterns
+3. a small key file (.ohlcv.key) records the source path, size and mtime, when the CSV changes the cache is rebuilt
+4. later reads open the copy with mmap, so repeated runs and worker processes share one page cached copy
+'''
+import os
+import hashlib
+import numpy as np
+import lib.ohlcv as ohlcv
+import lib.csv_schema as csv_schema
+
+CACHE_DIRECTORY = "../cache/ohlcv/"
+CACHE_VERSION = "1"
+CACHE_SUFFIX = ".ohlcv.npy"
+KEY_SUFFIX = ".ohlcv.key"
+
+def get_cache_file_name(pFileName, pSuffix, pDirectory=CACHE_DIRECTORY):
+	# the csv name stays readable, the hash keeps files of the same name in different directories apart
+	directory = os.path.dirname(os.path.abspath(pFileName))
+	return os.path.join(pDirectory, os.path.basename(pFileName) + "." + hashlib.sha1(directory.encode("utf-8")).hexdigest()[:8] + pSuffix)
+
+def get_cache_key(pFileName):
+	stat = os.stat(pFileName)
+	return CACHE_VERSION + " " + os.path.abspath(pFileName) + " " + str(stat.st_size) + " " + repr(stat.st_mtime)
+
+def read_cache_key(pFileName):
+	keyFileName = get_cache_file_name(pFileName, KEY_SUFFIX)
+	if not os.path.exists(keyFileName):
+		return None
+	keyfile = open(keyFileName, 'r')
+	try:
+		return keyfile.read().strip()
+	finally:
+		keyfile.close()
+
+def to_columns(pData):
+	columns = np.empty((6, len(pData)), dtype=np.int64)
+	columns[0] = pData.timestamps.astype(np.int64)
+	columns[1] = pData.open.view(np.int64)
+	columns[2] = pData.high.view(np.int64)
+	columns[3] = pData.low.view(np.int64)
+	columns[4] = pData.close.view(np.int64)
+	columns[5] = pData.volume.view(np.int64)
+	return columns
+
+def from_columns(pColumns):
+	# every column is a view into the (possibly memory mapped) block, nothing is copied
+	return ohlcv.OHLCVData(pColumns[0].view("datetime64[m]"), pColumns[1].view(np.float64), pColumns[2].view(np.float64), \
+		pColumns[3].view(np.float64), pColumns[4].view(np.float64), pColumns[5].view(np.float64))
+
+def write_cache(pFileName, pData, pKey):
+	# write to temp files and rename, so a concurrent reader never sees a half written cache
+	cacheFileName = get_cache_file_name(pFileName, CACHE_SUFFIX)
+	keyFileName = get_cache_file_name(pFileName, KEY_SUFFIX)
+	if not os.path.exists(os.path.dirname(cacheFileName)):
+		os.makedirs(os.path.dirname(cacheFileName))
+
+	tmpCache = cacheFileName + "." + str(os.getpid()) + ".tmp"
+	cachefile = open(tmpCache, 'wb')
+	try:
+		np.save(cachefile, to_columns(pData))
+	finally:
+		cachefile.close()
+	os.rename(tmpCache, cacheFileName)
+
+	tmpKey = keyFileName + "." + str(os.getpid()) + ".tmp"
+	keyfile = open(tmpKey, 'w')
+	try:
+		keyfile.write(pKey)
+	finally:
+		keyfile.close()
+	os.rename(tmpKey, keyFileName)
+
+def is_cached(pFileName):
+	# True when a cache built from the CSV as it is now exists
+	return read_cache_key(pFileName) == get_cache_key(pFileName) and os.path.exists(get_cache_file_name(pFileName, CACHE_SUFFIX))
+
+def build_cache_if_unchanged(pFileName, pKey):
+	# builds the cache after a tail read, unless the CSV changed since pKey was taken (it's still being written), returns True when built
+	if get_cache_key(pFileName) != pKey:
+		return False
+	load_ohlcv_cached(pFileName)
+	return True
+
+def load_ohlcv_cached(pFileName):
+	key = get_cache_key(pFileName)
+
+	cacheFileName = get_cache_file_name(pFileName, CACHE_SUFFIX)
+	if read_cache_key(pFileName) == key and os.path.exists(cacheFileName):
+		try:
+			return from_columns(np.load(cacheFileName, mmap_mode='r'))
+		except (IOError, ValueError):
+			pass # unreadable cache, fall through and rebuild it
+
+	data = csv_schema.load_ohlcv(pFileName)
+
+	try:
+		write_cache(pFileName, data, key)
+	except (IOError, OSError):
+		pass # no writable cache directory, run without a cache
+
+	return data
+
+def remove_cache(pFileName):
+	for suffix in (CACHE_SUFFIX, KEY_SUFFIX):
+		cacheFileName = get_cache_file_name(pFileName, suffix)
+		if os.path.exists(cacheFileName):
+			os.remove(cacheFileName)
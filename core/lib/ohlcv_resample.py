@@ -0,0 +1,46 @@
+'''
+HOW IT WORKS:
+1. every bar is assigned to a bucket of the higher timeframe: minutes since the epoch divided by the timeframe in minutes
+2. the data is in time order, so a bucket is a contiguous run of bars, its boundaries are found with one comparison pass
+3. open is the first bar of the run, close the last, high/low/volume are grouped numpy reductions (maximum/minimum/add.reduceat)
+4. buckets are aligned to the epoch, e.g. 4h bars start at 00:00, 04:00, 08:00 ... the newest bucket may still be forming
+'''
+import numpy as np
+import lib.ohlcv as ohlcv
+
+def get_timeframe_minutes(pData):
+	# the most common spacing between bars, used to skip resampling to the native timeframe
+	if len(pData) < 2:
+		return 0
+	spacing = np.diff(pData.timestamps.astype(np.int64))
+	values, counts = np.unique(spacing, return_counts=True)
+	return int(values[np.argmax(counts)])
+
+def resample(pData, pMinutes):
+	if len(pData) == 0:
+		return pData
+
+	buckets = pData.timestamps.astype(np.int64) // pMinutes
+	starts = np.flatnonzero(np.concatenate([[True], buckets[1:] != buckets[:-1]]))
+	ends = np.concatenate([starts[1:], [len(buckets)]]) - 1
+
+	return ohlcv.OHLCVData(
+		(buckets[starts] * pMinutes).astype("datetime64[m]"),
+		pData.open[starts],
+		np.maximum.reduceat(pData.high, starts),
+		np.minimum.reduceat(pData.low, starts),
+		pData.close[ends],
+		np.add.reduceat(pData.volume, starts))
+
+def resample_many(pData, pTimeframes):
+	# one parse serves every timeframe: {minutes: OHLCVData}, the native timeframe is passed through untouched
+	native = get_timeframe_minutes(pData)
+	result = {}
+	for minutes in pTimeframes:
+		if minutes == native:
+			result[minutes] = pData
+		elif native > 0 and minutes % native != 0:
+			raise ValueError(str(minutes) + "m is not a multiple of the " + str(native) + "m source data")
+		else:
+			result[minutes] = resample(pData, minutes)
+	return result
@@ -0,0 +1,29 @@
+'''
+HOW IT WORKS:
+1. the imbalance histogram counts heavy and light particles per pixel column, straight from the body coordinates
+2. a particle covers the floor(d) + 1 columns of its drawn box starting at floor(x - d/2) and counts floor(d) + 1 in each,
+   about the pixels its outline covers, so the ratios stay on the scale of the old rendered pixel counts
+3. particles within the top and bottom margin are left out, like the pixel scan did, they are detritus stuck to the walls
+4. get_imbalance_ratios turns the counts into the (columns x 2) array make_histogram draws from:
+   -(heavy + 1) / (light + 1) and (light + 1) / (heavy + 1)
+'''
+import numpy as np
+
+HISTOGRAM_MARGIN = 12 # pixels at the top and bottom of the tank that don't count
+
+def get_column_counts(pX, pY, pWidth, pHeight, pDiameter, pMargin=HISTOGRAM_MARGIN):
+	x = np.asarray(pX, dtype=np.float64)
+	y = np.asarray(pY, dtype=np.float64)
+	inside = (y >= pMargin) & (y < pHeight - pMargin)
+	x = x[inside]
+
+	first = np.floor(x - pDiameter / 2.0).astype(np.int64)
+	span = int(np.floor(pDiameter)) + 1 # columns covered by one particle
+	columns = (first[:, None] + np.arange(span)[None, :]).ravel()
+	columns = columns[(columns >= 0) & (columns < pWidth)]
+	return np.bincount(columns, minlength=pWidth)[:pWidth] * (np.floor(pDiameter) + 1.0)
+
+def get_imbalance_ratios(pHeavyCounts, pLightCounts):
+	heavy = np.asarray(pHeavyCounts, dtype=np.float64)
+	light = np.asarray(pLightCounts, dtype=np.float64)
+	return np.column_stack([-(heavy + 1.0) / (light + 1.0), (light + 1.0) / (heavy + 1.0)])
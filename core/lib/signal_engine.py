@@ -0,0 +1,87 @@
+'''
+HOW IT WORKS:
+1. CandleIndex maps every candle of the window to the pixel column it is painted at and to its bar timestamp,
+   both directions, with arithmetic instead of walking the candles
+2. score_candles reads the price SD, the volume SD and the particle imbalance under each candle in one numpy pass
+   and ranks the candles by price SD, rank 0 is the lowest SD
+3. buyers/sellers are the histogram imbalance ratios at the candle's column, direction is 1 when buyers dominate,
+   -1 when sellers dominate, 0 on a tie
+4. get_signals keeps the sigma_sort_low lowest SD candles that have a direction, the same candles make_histogram draws
+   entry lines for, as a numpy structured array (SIGNAL_DTYPE) that can be consumed without rendering
+'''
+import numpy as np
+
+SIGNAL_DTYPE = np.dtype([
+	("candle", np.int32), # index in the window, 0 is the oldest candle
+	("timestamp", "datetime64[m]"),
+	("x", np.int32), # pixel column of the candle
+	("close", np.float64),
+	("price_sd", np.float64),
+	("sd_rank", np.int32), # 0 is the lowest price SD of the window
+	("volume_sd", np.float64),
+	("buyers", np.float64),
+	("sellers", np.float64),
+	("imbalance", np.float64), # buyers - sellers
+	("direction", np.int8) # 1 buy, -1 sell, 0 no signal
+])
+
+class CandleIndex():
+
+	def __init__(self, pTimestamps, pFirstX, pCandleSpacing, pCount=None):
+		self.timestamps = pTimestamps if pCount is None else pTimestamps[:pCount]
+		self.first_x = pFirstX
+		self.spacing = pCandleSpacing
+		self.x = pFirstX + np.arange(len(self.timestamps)) * pCandleSpacing
+
+	def __len__(self):
+		return len(self.timestamps)
+
+	def candle_to_x(self, pCandle):
+		return self.first_x + pCandle * self.spacing
+
+	def x_to_candle(self, pX):
+		# the candle painted at or left of pixel column pX, -1 left of the first candle
+		candle = (np.asarray(pX) - self.first_x) // self.spacing
+		return np.where((candle >= 0) & (candle < len(self)), candle, -1)
+
+	def candle_to_timestamp(self, pCandle):
+		return self.timestamps[pCandle]
+
+	def timestamp_to_candle(self, pTimestamp):
+		# -1 when no candle of the window has that bar time
+		candle = np.searchsorted(self.timestamps, np.datetime64(pTimestamp, "m"))
+		return int(candle) if candle < len(self) and self.timestamps[candle] == np.datetime64(pTimestamp, "m") else -1
+
+def score_candles(pIndex, pClose, pPriceSd, pVolumeSd, pImbalanceRatios, pOrder=None):
+	# one row per candle, pImbalanceRatios is the (columns x 2) histogram array, pOrder the candles lowest SD first if known
+	count = len(pIndex)
+	table = np.zeros(count, dtype=SIGNAL_DTYPE)
+	if count == 0:
+		return table
+
+	columns = np.clip(pIndex.x, 0, len(pImbalanceRatios) - 1)
+	table["candle"] = np.arange(count)
+	table["timestamp"] = pIndex.timestamps
+	table["x"] = pIndex.x
+	table["close"] = pClose[:count]
+	table["price_sd"] = pPriceSd[:count]
+	table["volume_sd"] = pVolumeSd[:count]
+	table["buyers"] = np.abs(pImbalanceRatios[columns, 0])
+	table["sellers"] = np.abs(pImbalanceRatios[columns, 1])
+	table["imbalance"] = table["buyers"] - table["sellers"]
+	table["direction"] = np.sign(table["imbalance"])
+
+	if pOrder is None:
+		pOrder = np.argsort(table["price_sd"], kind="mergesort") # ties keep the older candle first, like heapq.nlargest
+	table["sd_rank"] = count
+	table["sd_rank"][np.asarray(pOrder, dtype=np.int64)] = np.arange(len(pOrder))
+	return table
+
+def get_signals(pTable, pCount):
+	# the pCount lowest SD candles with a direction, lowest SD first
+	lowest = pTable[pTable["sd_rank"] < pCount]
+	lowest = lowest[np.argsort(lowest["sd_rank"], kind="mergesort")]
+	return lowest[lowest["direction"] != 0]
+
+def save_signals(pFileName, pSignals):
+	np.save(pFileName, pSignals)
@@ -5,8 +5,8 @@ HOW IT WORKS:
 3. work out the mean of those squared differences
 4. return the square root of the squared differences
 '''
-import math
 import cmath
+import numpy as np
 
 def getMean(pNumberSet):
 	tmpTotal = 0
@@ -34,3 +34,100 @@ def getStandardDeviation(pNumberSet):
 # foo = [1,2,3,4,5,6,7,8,9,1,5,6,3,6,7,0,3,5,5,3,2]
 # print(getMean(foo))
 # print(getStandardDeviation(foo))
+
+#--- ROLLING WINDOWS ----------------------------------------------------------
+# getRollingStandardDeviation computes the whole series in one call over numpy arrays.
+# Entry i is the standard deviation of the window ending at i, ordered present to past
+# (pValues[i], pValues[i-1], ...). Early windows wrap around to the end of the series,
+# the same way negative list indexes did in the per-candle lookbacks.
+#
+# pCompatible=True reproduces getStandardDeviation(...).real above: the complex square root
+# of each difference, summed in the same order, then the principal complex square root of the mean.
+# pCompatible=False is the textbook population standard deviation from cumulative sums, O(n).
+
+CLASSIC_DIVISION = (1 / 2 == 0) # python 2 integer division, getMean floors the mean of whole numbers
+
+def getWindowIndexes(pLength, pPeriod):
+	return (np.arange(pLength)[:, None] - np.arange(pPeriod)[None, :]) % pLength
+
+def getSequentialSum(pWindows):
+	# column by column, so the floating point sum matches the order getMean adds in
+	tmpTotal = np.zeros(len(pWindows))
+	for j in range(0, pWindows.shape[1]):
+		tmpTotal = tmpTotal + pWindows[:, j]
+	return tmpTotal
+
+def getComplexSqrtReal(pReal, pImag):
+	# real part of the principal square root of pReal + pImag*i, same steps as cmath.sqrt
+	ax = np.abs(pReal) / 8.0
+	s = 2.0 * np.sqrt(ax + np.hypot(ax, np.abs(pImag) / 8.0))
+	with np.errstate(invalid='ignore', divide='ignore'):
+		d = np.where(s > 0, np.abs(pImag) / (2.0 * s), 0.0)
+	return np.where(pReal >= 0, s, d)
+
+def getWindowStandardDeviation(pWindows, pIntegerValues=False):
+	# getStandardDeviation(row).real for every row of a (windows x period) matrix, summed left to right
+	period = pWindows.shape[1]
+	means = getSequentialSum(pWindows)
+	if pIntegerValues and CLASSIC_DIVISION:
+		means = np.floor(means / period)
+	else:
+		means = means / period
+
+	differences = pWindows - means[:, None]
+	realMeans = getSequentialSum(np.sqrt(np.maximum(differences, 0.0))) / period
+	imagMeans = getSequentialSum(np.sqrt(np.maximum(-differences, 0.0))) / period
+	return getComplexSqrtReal(realMeans, imagMeans)
+
+def getRollingStandardDeviation(pValues, pPeriod, pCompatible=True, pIntegerValues=False):
+	values = np.asarray(pValues, dtype=np.float64)
+	if len(values) == 0:
+		return np.empty(0)
+
+	if not pCompatible:
+		return getRollingPopulationStandardDeviation(values, pPeriod)
+
+	return getWindowStandardDeviation(values[getWindowIndexes(len(values), pPeriod)], pIntegerValues)
+
+def getRollingPopulationStandardDeviation(pValues, pPeriod):
+	values = np.asarray(pValues, dtype=np.float64)
+	extended = np.concatenate([values[len(values) - (pPeriod - 1):], values]) if pPeriod > 1 else values
+	shifted = extended - extended[0] # keeps the cumulative sums small, avoids cancellation
+	sums = np.concatenate([[0.0], np.cumsum(shifted)])
+	squares = np.concatenate([[0.0], np.cumsum(shifted * shifted)])
+	windowSums = sums[pPeriod:] - sums[:-pPeriod]
+	windowSquares = squares[pPeriod:] - squares[:-pPeriod]
+	variance = windowSquares / pPeriod - (windowSums / pPeriod) ** 2
+	return np.sqrt(np.maximum(variance, 0.0))
+
+#--- SIGMA PERIOD SWEEPS -------------------------------------------------------
+# getRollingStandardDeviationMatrix computes the series for several periods at once, one row per period.
+# The windows of the longest period are gathered once, a shorter period masks the columns it doesn't use.
+# Masked columns add 0.0 to the running sums, so every row equals getRollingStandardDeviation for its period.
+
+def getMaskedWindowStandardDeviation(pWindows, pMask, pIntegerValues=False):
+	# getWindowStandardDeviation for rows of different lengths, pMask marks the columns each row uses
+	counts = pMask.sum(axis=1)
+	means = getSequentialSum(np.where(pMask, pWindows, 0.0))
+	if pIntegerValues and CLASSIC_DIVISION:
+		means = np.floor(means / counts)
+	else:
+		means = means / counts
+
+	differences = np.where(pMask, pWindows - means[:, None], 0.0)
+	realMeans = getSequentialSum(np.sqrt(np.maximum(differences, 0.0))) / counts
+	imagMeans = getSequentialSum(np.sqrt(np.maximum(-differences, 0.0))) / counts
+	return getComplexSqrtReal(realMeans, imagMeans)
+
+def getRollingStandardDeviationMatrix(pValues, pPeriods, pCompatible=True, pIntegerValues=False):
+	values = np.asarray(pValues, dtype=np.float64)
+	if len(values) == 0 or len(pPeriods) == 0:
+		return np.empty((len(pPeriods), len(values)))
+
+	if not pCompatible:
+		return np.array([getRollingPopulationStandardDeviation(values, p) for p in pPeriods])
+
+	windows = values[getWindowIndexes(len(values), max(pPeriods))]
+	rows = np.repeat(windows[None, :, :], len(pPeriods), axis=0).reshape(-1, windows.shape[1])
+	mask = np.repeat((np.arange(windows.shape[1])[None, :] < np.asarray(pPeriods)[:, None]), len(values), axis=0)
+	return getMaskedWindowStandardDeviation(rows, mask, pIntegerValues).reshape(len(pPeriods), len(values))
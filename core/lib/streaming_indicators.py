@@ -0,0 +1,272 @@
+'''
+HOW IT WORKS:
+1. live mode appends one bar at a time, so instead of recomputing every indicator over the whole window,
+   each indicator keeps just the state it needs (ring buffers of the last sigma_period inputs, running sums)
+2. update() folds in the new bar and returns the new candle's value, the cost depends on sigma_period, never on the history length
+3. the compatible SD and the MFI are re-summed over their ring buffer in the original order, so values match the batch functions,
+   the population SD keeps running sums and is O(1)
+4. LowestSigmaTracker keeps the candles of the current window sorted by SD, which answers sigma_sort_low without a heap pass
+5. StreamingIndicators bundles all of it plus a history of the last window_size outputs, and can be checkpointed with pickle,
+   one checkpoint per series in CHECKPOINT_DIRECTORY, every snapshot of the series continues the same state
+6. MT4 rewrites the forming bar until it closes, when the newest folded bar comes back with other values
+   update_from() takes it back with undo() and folds it in again, every part keeps what it needs to undo its last update
+Unlike the batch functions, the oldest candles of a window use the real bars before them instead of wrapping around.
+'''
+import os
+import bisect
+import pickle
+import numpy as np
+import lib.standard_deviation_function as sdef
+
+CHECKPOINT_DIRECTORY = "../cache/indicators/"
+
+def get_checkpoint_file_name(pSeriesName, pDirectory=CHECKPOINT_DIRECTORY):
+	return os.path.join(pDirectory, pSeriesName + ".indicators.pkl")
+
+class RingBuffer():
+
+	def __init__(self, pCapacity):
+		self.capacity = pCapacity
+		self.items = np.zeros(pCapacity)
+		self.count = 0 # total number of appends, the next write goes to count % capacity
+		self.replaced = 0.0 # the value the last append overwrote
+
+	def __len__(self):
+		return min(self.count, self.capacity)
+
+	def append(self, pValue):
+		self.replaced = self.items[self.count % self.capacity]
+		self.items[self.count % self.capacity] = pValue
+		self.count += 1
+
+	def undo_append(self):
+		# takes back the last append, one step only
+		self.count -= 1
+		self.items[self.count % self.capacity] = self.replaced
+
+	def newest(self):
+		return self.items[(self.count - 1) % self.capacity]
+
+	def oldest(self):
+		return self.items[self.count % self.capacity] if self.count >= self.capacity else self.items[0]
+
+	def values(self):
+		# oldest to newest
+		if self.count < self.capacity:
+			return self.items[:self.count].copy()
+		start = self.count % self.capacity
+		return np.concatenate([self.items[start:], self.items[:start]])
+
+	def present_to_past(self):
+		return self.values()[::-1]
+
+class RollingStandardDeviation():
+
+	def __init__(self, pPeriod, pCompatible=True, pIntegerValues=False):
+		self.period = pPeriod
+		self.compatible = pCompatible
+		self.integer_values = pIntegerValues
+		self.window = RingBuffer(pPeriod)
+		self.total = 0.0
+		self.total_squares = 0.0
+		self.outgoing = None # the value the last update pushed out of the window
+
+	def update(self, pValue):
+		self.outgoing = None
+		if len(self.window) == self.period:
+			outgoing = self.window.oldest()
+			self.outgoing = outgoing
+			self.total -= outgoing
+			self.total_squares -= outgoing * outgoing
+		self.window.append(pValue)
+		self.total += pValue
+		self.total_squares += pValue * pValue
+
+		count = len(self.window)
+		if self.compatible:
+			return float(sdef.getWindowStandardDeviation(self.window.present_to_past()[None, :], self.integer_values)[0])
+		return float(np.sqrt(max(self.total_squares / count - (self.total / count) ** 2, 0.0)))
+
+	def undo(self):
+		value = self.window.newest()
+		self.window.undo_append()
+		self.total -= value
+		self.total_squares -= value * value
+		if self.outgoing is not None:
+			self.total += self.outgoing
+			self.total_squares += self.outgoing * self.outgoing
+
+class RollingMoneyFlowIndex():
+
+	def __init__(self, pPeriod):
+		self.period = pPeriod
+		self.highs = RingBuffer(pPeriod)
+		self.lows = RingBuffer(pPeriod)
+		self.volumes = RingBuffer(pPeriod)
+
+	def update(self, pHigh, pLow, pVolume):
+		self.highs.append(pHigh)
+		self.lows.append(pLow)
+		self.volumes.append(pVolume)
+
+		highs = self.highs.present_to_past()
+		lows = self.lows.present_to_past()
+		volumes = self.volumes.present_to_past()
+
+		positiveFlow = 0.0
+		negativeFlow = 0.0
+		for i in range(len(highs) - 1, 0, -1):
+			if highs[i] > highs[i - 1]:
+				positiveFlow += highs[i] * volumes[i]
+			if lows[i] < lows[i - 1]:
+				negativeFlow += lows[i] * volumes[i]
+
+		if positiveFlow + negativeFlow <= 0:
+			return 50.0
+		return 100 * (positiveFlow / (positiveFlow + negativeFlow))
+
+	def undo(self):
+		for values in (self.highs, self.lows, self.volumes):
+			values.undo_append()
+
+class RollingMoneyFlowIndexStandardDeviation():
+
+	def __init__(self, pPeriod):
+		self.period = pPeriod
+		self.previous = RingBuffer(max(pPeriod - 1, 1)) # the MFI values before the current candle
+		self.count = 0
+
+	def update(self, pMfiValue):
+		result = 0.0
+		if self.count >= self.period and self.period > 1:
+			result = float(sdef.getWindowStandardDeviation(self.previous.values()[None, :])[0])
+		self.previous.append(pMfiValue)
+		self.count += 1
+		return result
+
+	def undo(self):
+		self.previous.undo_append()
+		self.count -= 1
+
+class LowestSigmaTracker():
+
+	def __init__(self, pWindowSize):
+		self.window_size = pWindowSize
+		self.sorted_items = [] # (sd, bar number), lowest SD first
+		self.bar_values = {} # bar number -> sd, for removing bars that leave the window
+		self.expired_item = None # the (sd, bar number) the last update removed
+
+	def update(self, pBarNumber, pValue):
+		bisect.insort(self.sorted_items, (pValue, pBarNumber))
+		self.bar_values[pBarNumber] = pValue
+
+		self.expired_item = None
+		expired = pBarNumber - self.window_size
+		if expired in self.bar_values:
+			self.expired_item = (self.bar_values.pop(expired), expired)
+			del self.sorted_items[bisect.bisect_left(self.sorted_items, self.expired_item)]
+
+	def undo(self, pBarNumber):
+		item = (self.bar_values.pop(pBarNumber), pBarNumber)
+		del self.sorted_items[bisect.bisect_left(self.sorted_items, item)]
+		if self.expired_item is not None:
+			bisect.insort(self.sorted_items, self.expired_item)
+			self.bar_values[self.expired_item[1]] = self.expired_item[0]
+
+	def lowest(self, pCount):
+		# [(bar number, sd)] of the pCount lowest SD candles still in the window
+		return [(barNumber, value) for value, barNumber in self.sorted_items[:pCount]]
+
+class StreamingIndicators():
+
+	def __init__(self, pSigmaPeriod, pWindowSize=315, pCompatible=True, pMfiChartHeight=720):
+		self.sigma_period = pSigmaPeriod
+		self.window_size = pWindowSize
+		self.compatible = pCompatible
+		self.mfi_chart_height = pMfiChartHeight # MFI is scaled to chart pixels before its SD, like interpolate_mfi
+		self.price_sd = RollingStandardDeviation(pSigmaPeriod, pCompatible)
+		self.volume_sd = RollingStandardDeviation(pSigmaPeriod, pCompatible, True)
+		self.mfi = RollingMoneyFlowIndex(pSigmaPeriod)
+		self.mfi_sd = RollingMoneyFlowIndexStandardDeviation(pSigmaPeriod)
+		self.lowest_sigma = LowestSigmaTracker(pWindowSize)
+		self.history = dict((name, RingBuffer(pWindowSize)) for name in ("price_sd", "volume_sd", "mfi", "mfi_y", "mfi_sd"))
+		self.bar_count = 0
+		self.last_timestamp = None
+		self.last_bar = None # (high, low, close, volume) of the newest folded bar
+		self.previous_timestamp = None
+		self.can_undo = False
+
+	def update(self, pTimestamp, pHigh, pLow, pClose, pVolume):
+		values = {}
+		values["price_sd"] = self.price_sd.update(pClose)
+		values["volume_sd"] = self.volume_sd.update(pVolume)
+		values["mfi"] = self.mfi.update(pHigh, pLow, pVolume)
+		values["mfi_y"] = float(np.interp(values["mfi"], [0, 100], [self.mfi_chart_height, 0]))
+		values["mfi_sd"] = self.mfi_sd.update(values["mfi_y"])
+
+		for name in values:
+			self.history[name].append(values[name])
+		self.lowest_sigma.update(self.bar_count, values["price_sd"])
+		self.bar_count += 1
+		self.previous_timestamp = self.last_timestamp
+		self.last_timestamp = pTimestamp
+		self.last_bar = (pHigh, pLow, pClose, pVolume)
+		self.can_undo = True
+		return values
+
+	def undo(self):
+		# takes back the newest bar, one step only
+		for indicator in (self.price_sd, self.volume_sd, self.mfi, self.mfi_sd):
+			indicator.undo()
+		for name in self.history:
+			self.history[name].undo_append()
+		self.bar_count -= 1
+		self.lowest_sigma.undo(self.bar_count)
+		self.last_timestamp = self.previous_timestamp
+		self.last_bar = None
+		self.can_undo = False
+
+	def update_from(self, pData):
+		# feeds every bar of pData newer than the last one seen and the newest one again if it was rewritten, returns how many were folded in
+		start = 0
+		if self.last_timestamp is not None:
+			start = int(np.searchsorted(pData.timestamps, self.last_timestamp, side="right"))
+			i = start - 1
+			if i >= 0 and pData.timestamps[i] == self.last_timestamp and self.can_undo == True and \
+				self.last_bar != (float(pData.high[i]), float(pData.low[i]), float(pData.close[i]), float(pData.volume[i])):
+				self.undo()
+				start = i
+		for i in range(start, len(pData)):
+			self.update(pData.timestamps[i], float(pData.high[i]), float(pData.low[i]), float(pData.close[i]), float(pData.volume[i]))
+		return len(pData) - start
+
+	def get_series(self, pName, pCount):
+		# the newest pCount values of one indicator, oldest first
+		values = self.history[pName].values()
+		return values[len(values) - pCount:] if pCount <= len(values) else None
+
+	def get_lowest_sigma(self, pCount, pWindowLength):
+		# [(window index, sd)] for a tank window holding the newest pWindowLength candles
+		firstBar = self.bar_count - pWindowLength
+		return [(barNumber - firstBar, value) for barNumber, value in self.lowest_sigma.lowest(pCount) if barNumber >= firstBar]
+
+	def matches(self, pSigmaPeriod, pWindowSize, pCompatible):
+		return self.sigma_period == pSigmaPeriod and self.window_size == pWindowSize and self.compatible == pCompatible
+
+	def save(self, pFileName):
+		if not os.path.exists(os.path.dirname(pFileName)):
+			os.makedirs(os.path.dirname(pFileName))
+		tmpFileName = pFileName + ".tmp"
+		checkpoint = open(tmpFileName, 'wb')
+		try:
+			pickle.dump(self, checkpoint, 2)
+		finally:
+			checkpoint.close()
+		os.rename(tmpFileName, pFileName)
+
+def load(pFileName):
+	checkpoint = open(pFileName, 'rb')
+	try:
+		return pickle.load(checkpoint)
+	finally:
+		checkpoint.close()
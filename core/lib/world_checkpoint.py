@@ -0,0 +1,118 @@
+'''
+HOW IT WORKS:
+1. at the end of a run the settled world is serialized with ep_world_serialize and pickled to ../checkpoints/,
+   together with the candles' bar times and boxes and the body ids of the candles, the particles and the mouse particle
+2. checkpoints are grouped by a key made of the series, the physics settings and the seed,
+   a run only ever starts from a checkpoint with its own key
+3. a new bar shifts the window one candle left, so candles are matched by bar time: a checkpoint candle matches
+   when the window holds the same bar with the same box, only moved left by the bars added since,
+   a run looks for the checkpoint with the most matching candles before building anything, if no more than
+   MAX_CHANGED_CANDLES differ it continues from that world instead of letting 2 x 1280 particles fall in and settle again,
+   the tank rolls the checkpoint's world to its own window the way live mode rolls to a new bar
+4. the chart is scaled to the window's lowest low and highest high rounded out to whole price units,
+   when a new bar moves either past the next unit every candle moves up or down and nothing matches, that run starts cold
+5. the file holds two pickles, the small header first, so matching never reads the serialized worlds it doesn't use
+6. at most CHECKPOINTS_PER_KEY files are kept per key, the least recently written go first
+'''
+import os
+import glob
+import pickle
+import hashlib
+
+CHECKPOINT_DIRECTORY = "../checkpoints/"
+CHECKPOINTS_PER_KEY = 16
+MAX_CHANGED_CANDLES = 5
+GEOMETRY_DECIMALS = 6 # candle boxes are compared after rounding, interp() output can differ in the last bits
+
+def get_key(pSeries, pSettings, pSeed):
+	return hashlib.sha1(repr((pSeries, sorted(pSettings.items()), pSeed)).encode("utf-8")).hexdigest()[:16]
+
+def get_geometry(pBoxes):
+	# (width, height, x, y) per candle box, oldest candle first
+	return [tuple(round(float(v), GEOMETRY_DECIMALS) for v in box[:4]) for box in pBoxes]
+
+def get_timestamps(pTimestamps):
+	return [str(t) for t in pTimestamps]
+
+def get_matching_count(pTimestamps, pGeometry, pOtherTimestamps, pOtherGeometry):
+	# candles of the window the other window holds as well, the same bar with the same box after the shift left
+	if len(pTimestamps) == 0 or pTimestamps[0] not in pOtherTimestamps:
+		return 0
+	shift = pOtherTimestamps.index(pTimestamps[0])
+	dx = pOtherGeometry[shift][2] - pGeometry[0][2]
+	count = 0
+	for i in range(0, min(len(pTimestamps), len(pOtherTimestamps) - shift)):
+		width, height, x, y = pOtherGeometry[i + shift]
+		if pTimestamps[i] == pOtherTimestamps[i + shift] and (width, height, round(x - dx, GEOMETRY_DECIMALS), y) == pGeometry[i]:
+			count += 1
+	return count
+
+class WorldCheckpoint():
+
+	def __init__(self, pKey, pTimestamps, pGeometry, pBodies, pWorldData=None):
+		self.key = pKey
+		self.timestamps = pTimestamps # bar time of each candle, oldest first, as strings
+		self.geometry = pGeometry
+		self.bodies = pBodies # {"candles": [...], "heavy": [...], "light": [...], "mouse": id}
+		self.world_data = pWorldData # the ep_world_serialize string, only read for the checkpoint that is used
+
+	def get_header(self):
+		return {"key": self.key, "timestamps": self.timestamps, "geometry": self.geometry, "bodies": self.bodies}
+
+def get_file_name(pKey, pTimestamps, pGeometry, pDirectory=CHECKPOINT_DIRECTORY):
+	return os.path.join(pDirectory, pKey + "_" + hashlib.sha1(repr((pTimestamps, pGeometry)).encode("utf-8")).hexdigest()[:16] + ".ckpt")
+
+def save_checkpoint(pCheckpoint, pDirectory=CHECKPOINT_DIRECTORY):
+	if not os.path.exists(pDirectory):
+		os.makedirs(pDirectory)
+
+	fileName = get_file_name(pCheckpoint.key, pCheckpoint.timestamps, pCheckpoint.geometry, pDirectory)
+	tmpFileName = fileName + ".tmp"
+	checkpointFile = open(tmpFileName, 'wb')
+	try:
+		pickle.dump(pCheckpoint.get_header(), checkpointFile, 2)
+		pickle.dump(pCheckpoint.world_data, checkpointFile, 2)
+	finally:
+		checkpointFile.close()
+	os.rename(tmpFileName, fileName)
+
+	prune(pCheckpoint.key, pDirectory)
+	return fileName
+
+def read_header(pFileName):
+	checkpointFile = open(pFileName, 'rb')
+	try:
+		return pickle.load(checkpointFile)
+	finally:
+		checkpointFile.close()
+
+def load_checkpoint(pFileName):
+	checkpointFile = open(pFileName, 'rb')
+	try:
+		header = pickle.load(checkpointFile)
+		worldData = pickle.load(checkpointFile)
+	finally:
+		checkpointFile.close()
+	return WorldCheckpoint(header["key"], header["timestamps"], header["geometry"], header["bodies"], worldData)
+
+def find_checkpoint(pKey, pTimestamps, pGeometry, pDirectory=CHECKPOINT_DIRECTORY, pMaxChanged=MAX_CHANGED_CANDLES):
+	# returns the nearest checkpoint and how many candles it shares, (None, 0) when none is close enough
+	bestFileName = None
+	bestCount = 0
+	for fileName in glob.glob(os.path.join(pDirectory, pKey + "_*.ckpt")):
+		try:
+			header = read_header(fileName)
+			count = get_matching_count(pTimestamps, pGeometry, header["timestamps"], header["geometry"])
+		except Exception:
+			continue # half written or from an older version
+		if count > bestCount:
+			bestFileName, bestCount = fileName, count
+
+	if bestFileName is None or len(pGeometry) - bestCount > pMaxChanged:
+		return None, 0
+	return load_checkpoint(bestFileName), bestCount
+
+def prune(pKey, pDirectory=CHECKPOINT_DIRECTORY, pKeep=CHECKPOINTS_PER_KEY):
+	fileNames = sorted(glob.glob(os.path.join(pDirectory, pKey + "_*.ckpt")), key=os.path.getmtime)
+	for fileName in fileNames[:max(0, len(fileNames) - pKeep)]:
+		os.remove(fileName)
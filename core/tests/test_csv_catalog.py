@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+import lib.csv_catalog as csv_catalog
+
+def write_bars(pFileName, pDay, pCount, pMtime):
+	csvfile = open(pFileName, 'w')
+	try:
+		for i in range(0, pCount):
+			csvfile.write("2018.04.%02d,%02d:%02d,106.450,106.486,106.421,106.452,1172\n" % (pDay, i // 4, (i % 4) * 15))
+	finally:
+		csvfile.close()
+	os.utime(pFileName, (pMtime, pMtime))
+
+class CSVCatalogTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.csv_directory = os.path.join(self.directory, "csv")
+		os.makedirs(self.csv_directory)
+		self.catalog = csv_catalog.CSVCatalog(self.csv_directory, "*.csv", os.path.join(self.directory, "catalog.sqlite"))
+
+	def tearDown(self):
+		self.catalog.close()
+		shutil.rmtree(self.directory)
+
+	def test_unrelated_plain_named_files_are_separate_series(self):
+		# a full history of one symbol must not hide a shorter but newer file of another
+		write_bars(os.path.join(self.csv_directory, "usdjpy.csv"), 13, 80, 1577836800) # 2020
+		write_bars(os.path.join(self.csv_directory, "eurusd.csv"), 12, 20, 1609459200) # 2021
+		self.catalog.refresh()
+
+		self.assertEqual([os.path.basename(f) for f in self.catalog.newest_snapshots()], ["eurusd.csv", "usdjpy.csv"])
+		self.assertEqual(sorted(series for f, series in self.catalog.snapshots()), ["eurusd", "usdjpy"])
+
+	def test_snapshots_of_one_series_that_add_no_bars_are_flagged(self):
+		write_bars(os.path.join(self.csv_directory, "USDJPY_15m_2018.04.13_10.00.csv"), 13, 40, 1577836800)
+		write_bars(os.path.join(self.csv_directory, "USDJPY_15m_2018.04.13_10.15.csv"), 13, 30, 1577836900)
+		self.catalog.refresh()
+
+		self.assertEqual([os.path.basename(f) for f in self.catalog.newest_snapshots()], ["USDJPY_15m_2018.04.13_10.00.csv"])
+
+	def test_rewritten_newest_snapshot_is_indexed_again(self):
+		fileName = os.path.join(self.csv_directory, "USDJPY_15m_2018.04.13_10.00.csv")
+		write_bars(fileName, 13, 40, 1577836800)
+		self.catalog.refresh()
+
+		write_bars(fileName, 13, 41, 1577836860)
+		self.assertEqual(self.catalog.refresh(), ["USDJPY_15m_2018.04.13_10.00.csv"])
+		self.assertEqual(self.catalog.connection.execute("SELECT row_count FROM snapshots").fetchone()[0], 41)
+
+if __name__ == "__main__":
+	unittest.main()